@@ -0,0 +1,2 @@
+DROP TRIGGER IF EXISTS historical_inserted_notify ON historical;
+DROP FUNCTION IF EXISTS notify_historical_inserted();
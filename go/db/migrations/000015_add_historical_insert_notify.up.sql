@@ -0,0 +1,17 @@
+-- Notify listeners once per statement with each ticker that received new bars
+CREATE OR REPLACE FUNCTION notify_historical_inserted() RETURNS trigger AS $$
+DECLARE
+    tid INTEGER;
+BEGIN
+    FOR tid IN SELECT DISTINCT ticker_id FROM inserted WHERE ticker_id IS NOT NULL LOOP
+        PERFORM pg_notify('historical_inserted', tid::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER historical_inserted_notify
+AFTER INSERT ON historical
+REFERENCING NEW TABLE AS inserted
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_historical_inserted();
@@ -0,0 +1,2 @@
+-- Latest-N bars per ticker (watchlist LATERAL query) read this index backwards and stop at the limit
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_historical_ticker_id_timestamp ON historical (ticker_id, "timestamp" DESC);
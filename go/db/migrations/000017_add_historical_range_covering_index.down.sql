@@ -0,0 +1 @@
+DROP INDEX CONCURRENTLY IF EXISTS idx_historical_ticker_source_timestamp;
@@ -0,0 +1,2 @@
+-- Covers the /stats/data range scan (ticker_id, source, timestamp range) so it can run as an index-only scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_historical_ticker_source_timestamp ON historical (ticker_id, source, "timestamp") INCLUDE (open, low, high, close, adj_close, volume, vwap, milliseconds, duration, transactions);
@@ -0,0 +1,32 @@
+-- Requires historical_legacy, i.e. the backfill was not run with --drop-legacy
+DROP TRIGGER IF EXISTS historical_inserted_notify ON historical;
+ALTER TABLE historical RENAME TO historical_partitioned;
+
+ALTER TABLE historical_legacy RENAME TO historical;
+ALTER SEQUENCE historical_id_seq OWNED BY historical.id;
+
+-- Keep bars ingested after the migration
+INSERT INTO historical (id, custom_id, symbol, milliseconds, duration, open, low, high, close, adj_close,
+                        volume, vwap, "timestamp", transactions, source, market, ticker_id)
+SELECT id, custom_id, symbol, milliseconds, duration, open, low, high, close, adj_close,
+       volume, vwap, "timestamp", transactions, source, market, ticker_id
+FROM historical_partitioned
+ON CONFLICT DO NOTHING;
+
+DROP TABLE historical_partitioned CASCADE;
+DROP FUNCTION IF EXISTS drain_historical_default();
+DROP FUNCTION IF EXISTS create_historical_partitions(DATE, INTEGER);
+
+ALTER INDEX IF EXISTS historical_legacy_pkey RENAME TO historical_pkey;
+ALTER INDEX IF EXISTS historical_legacy_custom_id_key RENAME TO historical_custom_id_key;
+ALTER INDEX IF EXISTS idx_historical_legacy_id RENAME TO idx_historical_id;
+ALTER INDEX IF EXISTS idx_historical_legacy_timestamp RENAME TO idx_historical_timestamp;
+ALTER INDEX IF EXISTS idx_historical_legacy_custom_id RENAME TO idx_historical_custom_id;
+ALTER INDEX IF EXISTS idx_historical_legacy_ticker_id_timestamp RENAME TO idx_historical_ticker_id_timestamp;
+ALTER INDEX IF EXISTS idx_historical_legacy_ticker_source_timestamp RENAME TO idx_historical_ticker_source_timestamp;
+
+CREATE TRIGGER historical_inserted_notify
+AFTER INSERT ON historical
+REFERENCING NEW TABLE AS inserted
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_historical_inserted();
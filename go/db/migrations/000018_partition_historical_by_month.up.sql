@@ -0,0 +1,118 @@
+-- Move the heap table aside, its rows are copied into the partitioned table by
+-- py/scripts/backfill_historical_partitions.py (newest months first, in short batches), which has
+-- to run right after this migration. Only the swap happens here so ingest and reads are blocked
+-- for the rename, not for a copy of the whole table
+DROP TRIGGER IF EXISTS historical_inserted_notify ON historical;
+ALTER TABLE historical RENAME TO historical_legacy;
+ALTER INDEX IF EXISTS historical_pkey RENAME TO historical_legacy_pkey;
+ALTER INDEX IF EXISTS historical_custom_id_key RENAME TO historical_legacy_custom_id_key;
+ALTER INDEX IF EXISTS idx_historical_id RENAME TO idx_historical_legacy_id;
+ALTER INDEX IF EXISTS idx_historical_timestamp RENAME TO idx_historical_legacy_timestamp;
+ALTER INDEX IF EXISTS idx_historical_custom_id RENAME TO idx_historical_legacy_custom_id;
+ALTER INDEX IF EXISTS idx_historical_ticker_id_timestamp RENAME TO idx_historical_legacy_ticker_id_timestamp;
+ALTER INDEX IF EXISTS idx_historical_ticker_source_timestamp RENAME TO idx_historical_legacy_ticker_source_timestamp;
+
+-- Range partitioned by month on timestamp, the partition key has to be part of every unique constraint
+CREATE TABLE historical (
+    id INTEGER NOT NULL DEFAULT nextval('historical_id_seq'),
+    custom_id VARCHAR(255) NOT NULL,
+    symbol VARCHAR(255) NOT NULL,
+    milliseconds BIGINT DEFAULT 0,
+    duration VARCHAR(20),
+    open DECIMAL(30,15) NOT NULL,
+    low DECIMAL(30,15) NOT NULL,
+    high DECIMAL(30,15) NOT NULL,
+    close DECIMAL(30,15) NOT NULL,
+    adj_close DECIMAL(30,15),
+    volume DECIMAL(20,2) DEFAULT 0,
+    vwap DECIMAL(30,15) DEFAULT 0,
+    timestamp TIMESTAMP NOT NULL,
+    transactions INT DEFAULT 0,
+    source VARCHAR(30) NOT NULL,
+    market VARCHAR(30) NOT NULL,
+    ticker_id INTEGER,
+    PRIMARY KEY (id, "timestamp"),
+    UNIQUE (custom_id, "timestamp"),
+    FOREIGN KEY (symbol) REFERENCES tickers(symbol),
+    CONSTRAINT fk_historical_ticker FOREIGN KEY (ticker_id) REFERENCES tickers(id) ON DELETE CASCADE
+) PARTITION BY RANGE ("timestamp");
+ALTER SEQUENCE historical_id_seq OWNED BY historical.id;
+
+CREATE INDEX idx_historical_timestamp ON historical ("timestamp");
+CREATE INDEX idx_historical_custom_id ON historical (custom_id);
+CREATE INDEX idx_historical_ticker_id_timestamp ON historical (ticker_id, "timestamp" DESC);
+CREATE INDEX idx_historical_ticker_source_timestamp ON historical (ticker_id, source, "timestamp") INCLUDE (open, low, high, close, adj_close, volume, vwap, milliseconds, duration, transactions);
+
+-- Bars outside every monthly partition land here until create_historical_partitions moves them out
+CREATE TABLE historical_default PARTITION OF historical DEFAULT;
+
+-- Creates `months` monthly partitions starting at start_month, skipping existing ones.
+-- Rows already sitting in the default partition for a new month are moved into it before attaching.
+CREATE OR REPLACE FUNCTION create_historical_partitions(start_month DATE, months INTEGER) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    month_end   DATE;
+    part_name   TEXT;
+    created     INTEGER := 0;
+BEGIN
+    -- Serializes concurrent callers (every API worker runs the maintenance task)
+    PERFORM pg_advisory_xact_lock(hashtext('create_historical_partitions'));
+    FOR i IN 0..months - 1 LOOP
+        month_start := (date_trunc('month', start_month) + make_interval(months => i))::date;
+        month_end   := (month_start + INTERVAL '1 month')::date;
+        part_name   := 'historical_' || to_char(month_start, '"y"YYYY"m"MM');
+        CONTINUE WHEN to_regclass(part_name) IS NOT NULL;
+
+        EXECUTE format('CREATE TABLE %I (LIKE historical INCLUDING DEFAULTS)', part_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM historical_default WHERE "timestamp" >= %L AND "timestamp" < %L RETURNING *) '
+            'INSERT INTO %I (id, custom_id, symbol, milliseconds, duration, open, low, high, close, adj_close, '
+            'volume, vwap, "timestamp", transactions, source, market, ticker_id) '
+            'SELECT id, custom_id, symbol, milliseconds, duration, open, low, high, close, adj_close, '
+            'volume, vwap, "timestamp", transactions, source, market, ticker_id FROM moved',
+            month_start, month_end, part_name
+        );
+        EXECUTE format(
+            'ALTER TABLE historical ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            part_name, month_start, month_end
+        );
+        created := created + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Gives every month held in the default partition its own partition
+CREATE OR REPLACE FUNCTION drain_historical_default() RETURNS INTEGER AS $$
+DECLARE
+    month   DATE;
+    created INTEGER := 0;
+BEGIN
+    FOR month IN SELECT DISTINCT date_trunc('month', "timestamp")::date FROM historical_default LOOP
+        created := created + create_historical_partitions(month, 1);
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for the whole legacy range plus the next three months, so the backfill never touches the default
+DO $$
+DECLARE
+    first_month DATE := COALESCE(
+        (SELECT date_trunc('month', min("timestamp"))::date FROM historical_legacy),
+        date_trunc('month', now())::date
+    );
+BEGIN
+    PERFORM create_historical_partitions(
+        first_month,
+        ((extract(year FROM age(date_trunc('month', now()), first_month)) * 12
+          + extract(month FROM age(date_trunc('month', now()), first_month)))::int) + 4
+    );
+END;
+$$;
+
+CREATE TRIGGER historical_inserted_notify
+AFTER INSERT ON historical
+REFERENCING NEW TABLE AS inserted
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_historical_inserted();
@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS idx_tickers_alt_names_trgm;
+DROP INDEX IF EXISTS idx_tickers_name_trgm;
+DROP INDEX IF EXISTS idx_tickers_symbol_trgm;
@@ -0,0 +1,5 @@
+-- Trigram indexes back ILIKE '%term%' and fuzzy (similarity / word_similarity) ticker search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_tickers_symbol_trgm ON tickers USING GIN (symbol gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tickers_name_trgm ON tickers USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tickers_alt_names_trgm ON tickers USING GIN ((alt_names::text) gin_trgm_ops);
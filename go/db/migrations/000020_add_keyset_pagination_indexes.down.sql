@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS idx_accounts_user_id_id;
+DROP INDEX IF EXISTS idx_api_user_id_id;
+DROP INDEX IF EXISTS idx_tickers_name_id;
@@ -0,0 +1,4 @@
+-- Keyset pagination seeks on the list endpoints' sort keys: WHERE (name, id) > (:name, :id) ORDER BY name, id
+CREATE INDEX IF NOT EXISTS idx_tickers_name_id ON tickers (name, id);
+CREATE INDEX IF NOT EXISTS idx_api_user_id_id ON api (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_accounts_user_id_id ON accounts (user_id, id);
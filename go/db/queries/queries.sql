@@ -155,7 +155,7 @@ INSERT INTO historical (
     $15, -- source
     $16  -- market
 )
-ON CONFLICT (custom_id) DO NOTHING
+ON CONFLICT (custom_id, "timestamp") DO NOTHING
 RETURNING *;
 
 -- name: GetExchange :one
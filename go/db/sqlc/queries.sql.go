@@ -711,7 +711,7 @@ INSERT INTO historical (
     $15, -- source
     $16  -- market
 )
-ON CONFLICT (custom_id) DO NOTHING
+ON CONFLICT (custom_id, "timestamp") DO NOTHING
 RETURNING id, custom_id, symbol, milliseconds, duration, open, low, high, close, adj_close, volume, vwap, timestamp, transactions, source, market, ticker_id
 `
 
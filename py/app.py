@@ -1,39 +1,47 @@
 from fastapi import FastAPI, WebSocket, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_pagination import add_pagination
+from components.responses import JSONResponse
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from config import settings
-from redis import Redis
+from redis.asyncio import Redis
 from components.auth.router import router as auth_router
 from components.symbols.router import router as symbols_router
 from components.accounts.router import router as accounts_router
 from components.api.router import router as api_router
 from components.permissions.router import router as permissions_router
 from components.stats.router import router as stats_router
+from components.stats.cache import listenForHistoricalInserts
+from components.services.redis_pool import createRedisPool
+from components.services.hashing import hashing_pool
+from components.symbols.utils import maintainHistoricalPartitions
+import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
     print("Engaging lifespan")
 
-    redis = Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        db=settings.redis_db,
-        password=settings.redis_password,
-        decode_responses=True,
-    )
-    print(redis.ping())
+    pool  = createRedisPool()
+    redis = Redis(connection_pool=pool)
+    print(await redis.ping())
     app.state.redis = redis
+    listener        = asyncio.create_task(listenForHistoricalInserts(redis))
+    partitions      = asyncio.create_task(maintainHistoricalPartitions())
 
     try:
         yield
     finally:
         print("Disengaging lifespan")
+        partitions.cancel()
+        listener.cancel()
+        await redis.aclose()
+        await pool.aclose()
+        hashing_pool.shutdown()
 
 
 
-app     = FastAPI(lifespan=lifespan)
+app     = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
 origins = [
     "http://localhost",
     "http://localhost:5173"
@@ -0,0 +1,12 @@
+"""
+Shared bootstrap for the benchmark scripts: puts the py/ package root on sys.path and
+fills in placeholder DB settings so config.settings loads without a real .env.
+Import it before anything from the app.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for key, value in {"DB_USER": "bench", "DB_PASSWORD": "bench", "DB_HOST": "localhost",
+                   "DB_PORT": "5432", "DB_NAME": "bench"}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,78 @@
+"""
+Encode time of a /stats/data style payload: jsonable_encoder + the stock JSONResponse
+against the orjson based components.responses.JSONResponse.
+
+    python benchmarks/json_encode.py --rows 100000
+
+Rows are shaped like the mappings the driver returns (Decimal numerics, datetimes).
+No database is needed.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+import _env  # noqa: F401
+
+
+def bars(rows: int) -> dict:
+    start = datetime(2015, 1, 1)
+    data  = []
+    price = 100.0
+    for i in range(rows):
+        price += ((i * 7919) % 200 - 100) / 1000
+        data.append({
+            "id": i, "custom_id": f"1-AAPL-{i}", "ticker_id": 1, "symbol": "AAPL",
+            "milliseconds": i * 60_000, "duration": "1 minute",
+            "open": Decimal(f"{price:.6f}"), "low": Decimal(f"{price - 0.5:.6f}"),
+            "high": Decimal(f"{price + 0.5:.6f}"), "close": Decimal(f"{price + 0.1:.6f}"),
+            "adj_close": None, "vwap": Decimal(f"{price:.6f}"), "timestamp": start + timedelta(minutes=i),
+            "transactions": 10, "source": "POLYGON", "market": "stocks",
+        })
+    return {"data": data}
+
+
+def columns(rows: int) -> dict:
+    close = 100 + np.cumsum(np.random.default_rng(0).standard_normal(rows)) / 10
+    return {"timestamp": np.arange(rows, dtype=np.int64) * 60_000, "close": close, "MA_20": close}
+
+
+def timed(fn, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body  = fn()
+        best  = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse as StarletteJSONResponse
+    from components.responses import JSONResponse
+
+    records = bars(args.rows)
+    arrays  = columns(args.rows)
+    cases   = [
+        ("records", "jsonable_encoder", lambda: StarletteJSONResponse(jsonable_encoder(records)).body),
+        ("records", "orjson", lambda: JSONResponse(records).body),
+        ("numpy", "jsonable_encoder", lambda: StarletteJSONResponse(jsonable_encoder(
+            {name: values.tolist() for name, values in arrays.items()})).body),
+        ("numpy", "orjson", lambda: JSONResponse(arrays).body),
+    ]
+
+    print(f"{'payload':<10}{'encoder':<18}{'seconds':>10}{'MB':>8}")
+    for payload, encoder, fn in cases:
+        seconds, size = timed(fn, args.repeat)
+        print(f"{payload:<10}{encoder:<18}{seconds:>10.3f}{size / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
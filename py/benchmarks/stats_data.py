@@ -0,0 +1,111 @@
+"""
+Compare the legacy and columnar /stats/data paths on synthetic bars.
+
+    python benchmarks/stats_data.py --rows 500000
+
+Each path runs in its own subprocess so peak RSS is measured independently.
+No database is needed, rows are generated in the shape the driver returns them.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import _env  # noqa: F401
+
+INDICATORS = [
+    {"name": "MA", "period": "20"},
+    {"name": "MA", "period": "50"},
+    {"name": "RSI", "period": "14"},
+    {"name": "ATR", "period": "14"},
+    {"name": "RETURN"},
+    {"name": "VOLATILITY"},
+]
+
+
+def _bars(rows: int):
+    start = datetime(2015, 1, 1)
+    price = 100.0
+    for i in range(rows):
+        price += ((i * 7919) % 200 - 100) / 1000
+        yield i, start + timedelta(minutes=i), price
+
+
+def legacy_rows(rows: int) -> list:
+    data = []
+    for i, stamp, price in _bars(rows):
+        data.append({
+            "id": i, "custom_id": f"1-AAPL-{i}", "ticker_id": 1, "symbol": "AAPL",
+            "milliseconds": int(stamp.timestamp() * 1000), "duration": "1 minute",
+            "open": Decimal(f"{price:.6f}"), "low": Decimal(f"{price - 0.5:.6f}"),
+            "high": Decimal(f"{price + 0.5:.6f}"), "close": Decimal(f"{price + 0.1:.6f}"),
+            "adj_close": None, "vwap": Decimal(f"{price:.6f}"), "timestamp": stamp,
+            "transactions": 10, "source": "POLYGON", "market": "stocks",
+        })
+    return data
+
+
+def columnar_rows(rows: int) -> list:
+    return [
+        (int(stamp.timestamp() * 1000), int(stamp.timestamp() * 1000), "1 minute",
+         price, price - 0.5, price + 0.5, price + 0.1, None, 1000.0, price, 10)
+        for i, stamp, price in _bars(rows)
+    ]
+
+
+def run_legacy(rows: int) -> tuple:
+    import pandas as pd
+    from fastapi.encoders import jsonable_encoder
+    from components.services.indicators import Indicators
+
+    data  = legacy_rows(rows)
+    start = time.perf_counter()
+    indicator = Indicators(pd.DataFrame(data), INDICATORS)
+    indicator.processIndicators()
+    body = json.dumps(jsonable_encoder({"data": indicator.getDf().to_dict(orient="records")}))
+    return time.perf_counter() - start, len(body)
+
+
+def run_columnar(rows: int) -> tuple:
+    from components.services.indicators import computeColumnarIndicators
+    from components.stats.utils import decodeHistoricalRows, streamColumnarRecords
+
+    data    = columnar_rows(rows)
+    start   = time.perf_counter()
+    columns = decodeHistoricalRows(data)
+    size    = sum(len(chunk) for chunk in streamColumnarRecords(
+        columns, computeColumnarIndicators(columns, INDICATORS)))
+    return time.perf_counter() - start, size
+
+
+def child(mode: str, rows: int):
+    elapsed, size = (run_legacy if mode == "legacy" else run_columnar)(rows)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"mode": mode, "seconds": elapsed, "bytes": size, "peak_rss_kb": peak}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--mode", choices=["legacy", "columnar"])
+    args = parser.parse_args()
+
+    if args.mode:
+        child(args.mode, args.rows)
+        return
+
+    print(f"{'mode':<10}{'seconds':>10}{'peak RSS (MB)':>16}{'payload (MB)':>15}")
+    for mode in ("legacy", "columnar"):
+        out    = subprocess.run([sys.executable, __file__, "--mode", mode, "--rows", str(args.rows)],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:<10}{result['seconds']:>10.3f}{result['peak_rss_kb'] / 1024:>16.1f}"
+              f"{result['bytes'] / 1e6:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page
+from components.responses import JSONResponse
+from fastapi_pagination import Page, pagination_ctx
 from fastapi_pagination.ext.sqlalchemy import paginate
-from fastapi.encoders import jsonable_encoder
+from typing import Union
+from components.pagination import CursorParams, CursorPage, cursorPaginate
 from sqlalchemy import select, text, func, update
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -54,7 +55,7 @@ async def add_account(
             content={
                 "success": True,
                 "message": "Successfully added account",
-                "data": jsonable_encoder(account)
+                "data": account
             },
         )
 
@@ -98,7 +99,7 @@ async def add_account(
             content={
                 "success": True,
                 "message": "Successfully added account",
-                "data": jsonable_encoder(account)
+                "data": account
             },
         )
 
@@ -353,22 +354,36 @@ async def client_delete_account(
 
 @router.get(
     "/admin/all", 
-    response_model=Page[AccountSchema],
-    dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
+    response_model=Union[Page[AccountSchema], CursorPage[AccountSchema]],
+    dependencies=[
+        Depends(RBAChecker(roles=['admin'], permissions=None)),
+        Depends(pagination_ctx(Page[AccountSchema]))],
+    description="Send ?cursor= (empty for the first page) for keyset pages with opaque cursors"
 )
-async def get_accounts(session: AsyncSession = Depends(get_session)):
+async def get_accounts(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    cursor: CursorParams = Depends()
+):
     query  = select(Account).options(selectinload(Account.user).lazyload(User.user_permissions))
+
+    if cursor.enabled:
+        return await cursorPaginate(session, query, [Account.id], AccountSchema, cursor, request.app.state.redis)
     return await paginate(session,query=query)
 
 @router.get(
     "/client/all", 
-    response_model=Page[AccountSchema],
-    dependencies=[Depends(RBAChecker(roles=['admin','client','demo'], permissions=None))]
+    response_model=Union[Page[AccountSchema], CursorPage[AccountSchema]],
+    dependencies=[
+        Depends(RBAChecker(roles=['admin','client','demo'], permissions=None)),
+        Depends(pagination_ctx(Page[AccountSchema]))],
+    description="Send ?cursor= (empty for the first page) for keyset pages with opaque cursors"
 )
 async def get_accounts_by_user(
     request: Request,
     session: AsyncSession = Depends(get_session), 
-    user: dict = Depends(ValidateJWT)
+    user: dict = Depends(ValidateJWT),
+    cursor: CursorParams = Depends()
 ):
     queryParams = dict(request.query_params)
     print(queryParams);
@@ -381,7 +396,8 @@ async def get_accounts_by_user(
     if "nickname" in queryParams:
         query = query.filter(Account.nickname.ilike(f"%{queryParams['nickname']}%"))
 
-
+    if cursor.enabled:
+        return await cursorPaginate(session, query, [Account.id], AccountSchema, cursor, request.app.state.redis)
     return await paginate(session,query=query)
 
 
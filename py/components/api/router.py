@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page
+from components.responses import JSONResponse
+from fastapi_pagination import Page, pagination_ctx
 from fastapi_pagination.ext.sqlalchemy import paginate
-from fastapi.encoders import jsonable_encoder
+from typing import Union
+from components.pagination import CursorParams, CursorPage, cursorPaginate
 from sqlalchemy import select, text, func, update, String
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from components.database import get_session
 from components.auth.utils import RBAChecker, ValidateJWT
-from fastapi.encoders import jsonable_encoder
 from .models import Api
 from .schemas import  (
     AddApiBody, 
@@ -204,7 +204,7 @@ async def update_api_record(
             content={
                 "success": True,
                 "message": "Successfully updated api record.",
-                "data": jsonable_encoder(ApiOutSchema.model_validate(api).model_dump())
+                "data": ApiOutSchema.model_validate(api)
             },
         )
 
@@ -215,13 +215,17 @@ async def update_api_record(
 
 @router.get(
     "/all", 
-    response_model=Page[ApiOutSchema],
-    dependencies=[Depends(RBAChecker(roles=['admin','client','demo'], permissions=None))]
+    response_model=Union[Page[ApiOutSchema], CursorPage[ApiOutSchema]],
+    dependencies=[
+        Depends(RBAChecker(roles=['admin','client','demo'], permissions=None)),
+        Depends(pagination_ctx(Page[ApiOutSchema]))],
+    description="Send ?cursor= (empty for the first page) for keyset pages with opaque cursors"
 )
 async def get_api_records_by_user(
     request: Request,
     session: AsyncSession = Depends(get_session), 
-    user: dict = Depends(ValidateJWT)
+    user: dict = Depends(ValidateJWT),
+    cursor: CursorParams = Depends()
 ):
     queryParams = dict(request.query_params)
     query       = select(Api) \
@@ -235,6 +239,8 @@ async def get_api_records_by_user(
     if "nickname" in queryParams:
         query = query.filter(Api.nickname.ilike(f"%{queryParams['nickname']}%"))
 
+    if cursor.enabled:
+        return await cursorPaginate(session, query, [Api.id], ApiOutSchema, cursor, request.app.state.redis)
     return await paginate(session,query=query)
 
 
@@ -1,7 +1,31 @@
-from sqlalchemy import text, bindparam, String
+from sqlalchemy import text, bindparam, String, Integer
 from sqlalchemy.dialects.postgresql import ARRAY
 
 
+# GetWatchlistQuery columns and their Arrow types, for Arrow IPC / Parquet watchlist output
+WatchlistFields = (
+    ("ticker_id", "int32"),
+    ("symbol", "string"),
+    ("market", "string"),
+    ("industry", "string"),
+    ("custom_id", "string"),
+    ("milliseconds", "int64"),
+    ("duration", "string"),
+    ("open", "double"),
+    ("low", "double"),
+    ("close", "double"),
+    ("high", "double"),
+    ("adj_close", "double"),
+    ("volume", "double"),
+    ("vwap", "double"),
+    ("timestamp", "timestamp[us]"),
+    ("transactions", "int32"),
+    ("source", "string"),
+)
+
+
+# Each matched ticker walks idx_historical_ticker_id_timestamp backwards and stops after :bars rows,
+# however old or sparse its series is
 GetWatchlistQuery = text("""
     WITH pairs(symbol, market) AS (
     SELECT DISTINCT *
@@ -27,30 +51,35 @@ GetWatchlistQuery = text("""
         h.vwap,
         h."timestamp",
         h.transactions,
-        h.source,
-        h.market
+        h.source
     FROM tickers t
     JOIN pairs p
     ON t.symbol = p.symbol AND t.market = p.market
-    LEFT JOIN (
-        SELECT *
-        FROM (
-            SELECT
-                h.*,
-                ROW_NUMBER() OVER (
-                    PARTITION BY h.ticker_id
-                    ORDER BY h."timestamp" DESC
-                ) AS rn
-            FROM historical h
-            JOIN tickers t2 ON t2.id = h.ticker_id
-            JOIN pairs p2 ON p2.symbol = t2.symbol AND p2.market = t2.market
-        ) ranked
-        WHERE rn <= 100
-    ) h ON h.ticker_id = t.id
+    LEFT JOIN LATERAL (
+        SELECT
+            h.custom_id,
+            h.milliseconds,
+            h.duration,
+            h."open",
+            h.low,
+            h."close",
+            h.high,
+            h.adj_close,
+            h.volume,
+            h.vwap,
+            h."timestamp",
+            h.transactions,
+            h.source
+        FROM historical h
+        WHERE h.ticker_id = t.id
+        ORDER BY h."timestamp" DESC
+        LIMIT :bars
+    ) h ON TRUE
     ORDER BY t.id, h."timestamp" DESC
     """).bindparams(
         bindparam("symbols", type_=ARRAY(String())),
         bindparam("markets", type_=ARRAY(String())),
+        bindparam("bars", type_=Integer()),
 )
 
 
@@ -1,18 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from components.responses import JSONResponse
 from components.database import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from .utils import (
     RBAChecker, 
     ValidateJWT, 
     generate_jwt_keys, 
+    encodeJwtKeys,
     forgotToken, 
     ValidateJWTByToken, 
     GetRefreshTokenFromRequest
 )
-from fastapi_pagination import Page
+from fastapi_pagination import Page, pagination_ctx
 from fastapi_pagination.ext.sqlalchemy import paginate
+from components.pagination import CursorParams, CursorPage, cursorPaginate
 from sqlalchemy import select, update, or_, func, text, tuple_
 from sqlalchemy.orm import joinedload, selectinload
 from .schemas import (
@@ -28,15 +29,19 @@ from .schemas import (
     WatchlistOutSchema
 )
 from .models import User, Reviews
-import bcrypt
 from components.utils import get_cookie_options
+from config import settings
+from components.services.hashing import hashSecret, checkSecret
+from .tokens import storeRefreshToken, rotateRefreshToken, revokeRefreshToken, revokeUserTokens
 from components.services.emailer import Emailer
-from typing import Optional, Annotated, List
+from components.services.arrow import negotiateFormat, recordsTable, tableResponse
+from typing import Optional, Annotated, List, Union
 from components.symbols.models import Tickers
 from .queries import (
     GetWatchlistQuery,
     UpdateWatchlistQuery, 
-    DeleteWatchlistQuery
+    DeleteWatchlistQuery,
+    WatchlistFields,
 )
 
 router = APIRouter()
@@ -45,7 +50,11 @@ router = APIRouter()
 @router.post(
     "/login",
 )
-async def login(data: LoginBody, session: AsyncSession = Depends(get_session)):
+async def login(
+    data: LoginBody,
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
     query = select(User).where(User.username == data.username)
     result = await session.execute(query)
     user = result.scalar_one_or_none()
@@ -56,7 +65,7 @@ async def login(data: LoginBody, session: AsyncSession = Depends(get_session)):
             detail={"success": False, "message": "Invalid Credentials"}
         )
 
-    isValid = bcrypt.checkpw(data.password.encode(), user.password.encode())
+    isValid = await checkSecret(data.password, user.password)
 
     # Load the role and email attributes explicitly before committing
     user_role = user.role.value
@@ -71,13 +80,13 @@ async def login(data: LoginBody, session: AsyncSession = Depends(get_session)):
         )
 
     keys = generate_jwt_keys(user)
-    salt = bcrypt.gensalt()
-    encryptedRefresh = bcrypt.hashpw(keys['refreshToken'].encode(), salt=salt)
-
-    stmt = update(User).where(User.id == user.id).values(
-        refresh_token=encryptedRefresh.decode("utf-8"))
-    await session.execute(stmt)
-    await session.commit()
+    await storeRefreshToken(
+        request.app.state.redis,
+        keys["refreshTokenId"],
+        keys["refreshTokenTTL"],
+        {"id": user.id, "role": user_role, "email": user_email, "username": user_username},
+        device=request.headers.get("user-agent")
+    )
 
     response_data = {
         "success": True,
@@ -119,8 +128,7 @@ async def register(
             )
 
         # === Hash password and create new user ===
-        hashed_password = bcrypt.hashpw(
-            data.password.encode(), bcrypt.gensalt()).decode("utf-8")
+        hashed_password = await hashSecret(data.password)
         new_user = User(
             username=data.username,
             first_name=data.firstName,
@@ -146,6 +154,8 @@ async def register(
             content={"success": True, "data": user_dict}
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(e)
         raise HTTPException(
@@ -195,6 +205,7 @@ async def forgot_password(
 @router.post("/reset")
 async def reset_password(
     data: ResetPasswordBody,
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     try:
@@ -211,10 +222,11 @@ async def reset_password(
 
         # Update user credentials
         user.forgot_token = None
-        user.password = bcrypt.hashpw(
-            data.password.encode(), bcrypt.gensalt()).decode("utf-8")
+        user.password = await hashSecret(data.password)
+        user_id = user.id
         session.add(user)
         await session.commit()
+        await revokeUserTokens(request.app.state.redis, user_id)
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -222,6 +234,8 @@ async def reset_password(
                      "message": "Successfully updated password."}
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(e)
         raise HTTPException(
@@ -238,6 +252,7 @@ async def reset_password(
 )
 async def update_user(
     data: UpdateUserBody,
+    request: Request,
     session: AsyncSession = Depends(get_session),
 ):
     try:
@@ -267,9 +282,13 @@ async def update_user(
         # === Step 3: Prepare update data ===
         update_data = data.dict(exclude_none=True)
         if "password" in update_data:
-            update_data["password"] = bcrypt.hashpw(
-                update_data["password"].encode(), bcrypt.gensalt()
-            ).decode("utf-8")
+            update_data["password"] = await hashSecret(update_data["password"])
+
+        # Refresh records carry email and username forward, so changing either ends those sessions
+        identity_changed = any(
+            field in update_data and update_data[field] != getattr(user, field)
+            for field in ("email", "username")
+        )
 
         # === Step 4: Run update query ===
         stmt = (
@@ -285,6 +304,10 @@ async def update_user(
         # Refresh the user object to get updated data
         await session.refresh(user)
 
+        # A new password or identity signs out every device
+        if "password" in update_data or identity_changed:
+            await revokeUserTokens(request.app.state.redis, user.id)
+
         # If you need to load relationships, use this:
         result = await session.execute(
             select(User)
@@ -308,6 +331,8 @@ async def update_user(
             },
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         await session.rollback()
         print(f"Error: {e}")
@@ -324,11 +349,10 @@ async def update_user(
         Depends(RBAChecker(roles=['admin', 'demo', 'client'], permissions=None))]
 )
 async def identify_user(
-    request: Request,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    params: dict = Depends(ValidateJWT)
 ):
     try:
-        params  = ValidateJWT(request=request)
         user_id = params.get("id")
 
         if user_id:
@@ -353,47 +377,37 @@ async def identify_user(
 @router.post(
     "/refresh"
 )
-async def refresh_token(
-    request: Request,
-    session: AsyncSession = Depends(get_session)
-):
+async def refresh_token(request: Request):
     try:
-        token  = GetRefreshTokenFromRequest(request)
-        token  = token["refreshToken"]
-        params = ValidateJWTByToken(token)
-        user   = None
-
-        if "id" in params:
-            query = select(User).where(User.id == params["id"])
-            result = await session.execute(query)
-            user = result.scalar_one_or_none()
+        token  = GetRefreshTokenFromRequest(request) or {}
+        params = ValidateJWTByToken(token.get("refreshToken") or "") or {}
+        redis  = request.app.state.redis
+        # Consuming the stored token id both validates and rotates it in one round-trip
+        user   = await rotateRefreshToken(redis, params["jti"]) if "jti" in params else None
 
-        if user is None:
+        if user is None or user.get("id") != params.get("id"):
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"success": False,
                          "message": "Invalid refresh token, operation not permitted"}
             )
 
-        # Check if refresh token is valid on backend
-        isValidToken = bcrypt.checkpw(
-            token.encode(), user.refresh_token.encode())
-        if not isValidToken:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"success": False,
-                         "message": "Invalid refresh token, operation not permitted"}
-            )
-
-        keys = generate_jwt_keys(user)
+        keys = encodeJwtKeys(user["id"], user["role"])
+        await storeRefreshToken(
+            redis,
+            keys["refreshTokenId"],
+            keys["refreshTokenTTL"],
+            {"id": user["id"], "role": user["role"], "email": user["email"], "username": user["username"]},
+            device=request.headers.get("user-agent")
+        )
         response_data = {
             "success": True,
             "message": "Successfully refreshed access token",
             "accessToken": keys.get("accessToken"),
             "refreshToken": keys.get("refreshToken"),
-            "role": user.role.value,
-            "email": user.email,
-            "username": user.username,
+            "role": user["role"],
+            "email": user["email"],
+            "username": user["username"],
         }
         response = JSONResponse(content=response_data,
                                 status_code=status.HTTP_200_OK)
@@ -404,17 +418,59 @@ async def refresh_token(
         
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(e)
 
 
+@router.post(
+    "/logout"
+)
+async def logout(request: Request, everywhere: bool = Query(False, alias="all")):
+    try:
+        token  = GetRefreshTokenFromRequest(request) or {}
+        params = ValidateJWTByToken(token.get("refreshToken") or "") or {}
+        redis  = request.app.state.redis
+
+        if everywhere and "id" in params:
+            await revokeUserTokens(redis, params["id"])
+        elif "jti" in params:
+            await revokeRefreshToken(redis, params["jti"])
+
+        response = JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={"success": True, "message": "Successfully logged out."}
+        )
+        response.delete_cookie(key="accessToken")
+        response.delete_cookie(key="refreshToken")
+        return response
+
+    except Exception as e:
+        print(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"success": False, "error": "Could not process, please try again"}
+        )
+
+
 @router.get(
     "/users",
-    response_model=Page[UserSchema],
-    dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
+    response_model=Union[Page[UserSchema], CursorPage[UserSchema]],
+    dependencies=[
+        Depends(RBAChecker(roles=['admin'], permissions=None)),
+        Depends(pagination_ctx(Page[UserSchema]))],
+    description="Send ?cursor= (empty for the first page) for keyset pages with opaque cursors"
 )
-async def get_users(session: AsyncSession = Depends(get_session)):
+async def get_users(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    cursor: CursorParams = Depends()
+):
     query = select(User).options(joinedload(User.user_permissions))
+
+    if cursor.enabled:
+        return await cursorPaginate(session, query, [User.id], UserSchema, cursor, request.app.state.redis)
     return await paginate(session, query=query)
 
 
@@ -434,8 +490,7 @@ async def add_new_review(
 		record = Reviews(**review.dict())
 		session.add(record)
 		await session.commit()
-		content  = jsonable_encoder({"status": "Successfully added review."})
-		return JSONResponse(content=content, status_code=200)
+		return JSONResponse(content={"status": "Successfully added review."}, status_code=200)
 
 
 @router.get("/review/all", description="Get latest 9 reviews", response_model=List[ReviewOut])
@@ -453,14 +508,18 @@ async def get_reviews(
     dependencies=[Depends(RBAChecker(roles=['admin','client','demo'], permissions=None))]
 )
 async def get_watchlist_items(
+    request: Request,
     session: AsyncSession = Depends(get_session),
-    user: dict = Depends(ValidateJWT)
+    user: dict = Depends(ValidateJWT),
+    bars: int = Query(default=settings.watchlist_bars, ge=1, le=settings.watchlist_max_bars)
 ):
     stmt        = select(User.id, User.watchlist).where(User.id == user.get("id"))
     result      = await session.execute(stmt)
     watchlist   = result.first()
-    watchlist   = sorted(watchlist[1], key=lambda x: x["symbol"]) if len(watchlist)>=1 else []
+    watchlist   = sorted(watchlist[1] or [], key=lambda x: x["symbol"]) if watchlist else []
     conditions  = {"symbols": [], "markets": []}
+    fmt         = negotiateFormat(request.headers.get("accept", ""))
+    bars_rows   = []
 
     for item in watchlist:
         if isinstance(item, dict):
@@ -469,16 +528,26 @@ async def get_watchlist_items(
 
     if conditions and watchlist:
         res       = await session.execute(GetWatchlistQuery, 
-                            {"symbols": conditions["symbols"], "markets": conditions["markets"] 
-                    })
-        historical   = res.mappings().all()
+                            {"symbols": conditions["symbols"], "markets": conditions["markets"], "bars": bars})
+        grouped   = {}
 
+        # Rows arrive ordered by ticker then timestamp, one pass buckets them per (symbol, market)
+        for row in res.mappings():
+            bucket = grouped.setdefault((row["symbol"], row["market"]), [])
+            if row["timestamp"] is not None:
+                bucket.append(row)
+                bars_rows.append(row)
+
+        # Arrow IPC / Parquet clients get every bar as one flat table keyed by symbol and market
+        if fmt:
+            return tableResponse(recordsTable(bars_rows, WatchlistFields), fmt, "watchlist")
 
         for item in watchlist:
-            item["historical"] = list(filter(lambda d: d["symbol"] == item.get("symbol") 
-                                             and d["market"] == item.get("market"), historical ))
-        
-        return watchlist
+            item["historical"] = grouped.get((item.get("symbol"), item.get("market")), [])
+
+    if fmt:
+        return tableResponse(recordsTable([], WatchlistFields), fmt, "watchlist")
+    return watchlist
 
 @router.post(
     "/watchlist",
@@ -0,0 +1,63 @@
+import hmac
+import json
+import hashlib
+from time import time
+from typing import Optional
+from redis.asyncio import Redis
+from config import settings
+from components.services.redis_pool import pipelined
+
+REFRESH_KEY       = "auth:refresh:{digest}"
+USER_SESSIONS_KEY = "auth:refresh:user:{user_id}"
+
+
+def _tokenDigest(jti: str) -> str:
+    # Only a keyed hash of the token id is stored, a leaked keyspace can't be replayed
+    return hmac.new((settings.jwt_secret or "").encode(), jti.encode(), hashlib.sha256).hexdigest()
+
+
+async def storeRefreshToken(
+    redis: Redis,
+    jti: str,
+    ttl: int,
+    user: dict,
+    device: Optional[str] = None
+):
+    """
+    Records an issued refresh token. Each login or rotation gets its own entry, so every
+    device holds an independent session, tracked in a per-user set for revoke-all.
+    """
+    digest   = _tokenDigest(jti)
+    sessions = USER_SESSIONS_KEY.format(user_id=user["id"])
+    record   = {**user, "device": (device or "")[:120], "issued": int(time())}
+    await pipelined(redis, [
+        ("set", REFRESH_KEY.format(digest=digest), json.dumps(record), ttl),
+        ("sadd", sessions, digest),
+        ("expire", sessions, ttl),
+    ], transaction=True)
+
+
+async def rotateRefreshToken(redis: Redis, jti: str) -> Optional[dict]:
+    """
+    Atomically consumes a refresh token and returns its record, or None when it was
+    already rotated, revoked or expired. A token can therefore be exchanged only once.
+    """
+    digest = _tokenDigest(jti)
+    record = await redis.getdel(REFRESH_KEY.format(digest=digest))
+    if record is None:
+        return None
+
+    record = json.loads(record)
+    await redis.srem(USER_SESSIONS_KEY.format(user_id=record["id"]), digest)
+    return record
+
+
+async def revokeRefreshToken(redis: Redis, jti: str):
+    await rotateRefreshToken(redis, jti)
+
+
+async def revokeUserTokens(redis: Redis, user_id: int):
+    sessions = USER_SESSIONS_KEY.format(user_id=user_id)
+    digests  = await redis.smembers(sessions)
+    keys     = [REFRESH_KEY.format(digest=digest.decode()) for digest in digests]
+    await redis.unlink(sessions, *keys)
@@ -3,17 +3,22 @@ import jwt
 import base64
 import json
 import secrets
+import hashlib
+from time import time
 from config import settings
 from typing import List, Optional
-from .models import User, UserPermission
+from .models import User
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from components.database import get_session
+from components.permissions.utils import getUserPermissions
+from components.utils import TTLCache
 from datetime import datetime, timedelta, timezone
 from config import settings
 from urllib.parse import unquote
 
+claims_cache = TTLCache(maxsize=settings.jwt_claims_cache_size, ttl=settings.jwt_claims_cache_ttl)
+
 def DecodeBase64Token(token: str) -> dict:
     try:
         decoded_token = unquote(token)
@@ -46,8 +51,12 @@ def GetRefreshTokenFromRequest(request: Request) -> dict | None:
      elif request.cookies.get('remix') != None:
         cookie    = request.cookies.get('remix')
         decodeObj = DecodeBase64Token(cookie)
-        claims    = decodeObj.get("claims").get("user")
-        return {"refreshToken": claims.get("refreshToken")}
+        try:
+            claims = decodeObj.get("claims").get("user")
+            return {"refreshToken": claims.get("refreshToken")}
+        except AttributeError:
+            # Undecodable or foreign cookie, same as carrying no refresh token
+            return None
      else:
          return None
          
@@ -59,59 +68,64 @@ def ValidateJWTByToken(token: str)-> dict | None:
     except Exception as e:
         return None
         
-def ValidateJWT(request: Request):
+def _requestCredential(request: Request) -> tuple | None:
+    # Same precedence as before: bearer header, then the remix session cookie, then accessToken
     if request.headers.get('bearer') != None:
-        token  = request.headers.get('bearer')
-        try:
-         params = jwt.decode(token, settings.jwt_secret, algorithms=['HS256'])
-         return params
-        except jwt.DecodeError:
-           raise HTTPException(status_code=401, detail="Not Authorized")
-        except jwt.InvalidTokenError:
-           raise HTTPException(status_code=401, detail="Not Authorized")
-        except Exception as e:
-            raise HTTPException(status_code=401, detail="Not Authorized")
-        
+        return "bearer", request.headers.get('bearer')
     if request.cookies.get('remix') != None:
-        cookie  = request.cookies.get('remix')
-        
-        try:
-         decodeObj = DecodeBase64Token(cookie)
-         claims    = decodeObj.get("claims").get("user")
-         params    = jwt.decode(claims.get("accessToken"), settings.jwt_secret, algorithms=['HS256'])
-         return params
-        except jwt.DecodeError:
-           raise HTTPException(status_code=401, detail="Not Authorized")
-        except jwt.InvalidTokenError:
-           raise HTTPException(status_code=401, detail="Not Authorized")
-        except Exception as e:
-            raise HTTPException(status_code=401, detail="Not Authorized")
-        
+        return "remix", request.cookies.get('remix')
     if request.cookies.get('accessToken') != None:
-        token  = request.cookies.get('accessToken')
-        try:
-            params = jwt.decode(token, settings.jwt_secret, algorithms=['HS256'])
-            return params
-        except jwt.DecodeError:
-           raise HTTPException(status_code=401, detail="Not Authorized")
-        except jwt.InvalidTokenError:
-           raise HTTPException(status_code=401, detail="Not Authorized")
-        except Exception as e:
-            raise HTTPException(status_code=401, detail="Not Authorized")
+        return "accessToken", request.cookies.get('accessToken')
+    return None
+
+def _decodeCredential(source: str, value: str) -> dict:
+    if source == "remix":
+        decodeObj = DecodeBase64Token(value)
+        claims    = decodeObj.get("claims").get("user")
+        value     = claims.get("accessToken")
+    return jwt.decode(value, settings.jwt_secret, algorithms=['HS256'])
+
+def _decodeRequestClaims(request: Request):
+    credential = _requestCredential(request)
+    if credential is None:
+        return None
+
+    # Verified claims are cached under a digest of the raw credential until the token expires
+    key    = hashlib.sha256("\0".join(credential).encode()).digest()
+    params = claims_cache.get(key)
+    if params is not None:
+        return dict(params)
+
+    try:
+        params = _decodeCredential(*credential)
+    except Exception as e:
+        raise HTTPException(status_code=401, detail="Not Authorized")
+
+    expires = params.get("exp")
+    claims_cache.set(key, params, ttl=expires - time() if expires else None)
+    return dict(params)
+
+async def ValidateJWT(request: Request):
+    # Claims are decoded once per request and reused by RBAChecker and handlers. Async so it runs
+    # on the event loop: claims_cache is not thread-safe and must not be touched from the threadpool
+    if not hasattr(request.state, "jwt_claims"):
+        request.state.jwt_claims = _decodeRequestClaims(request)
+    return request.state.jwt_claims
 
 def RBAChecker(roles: List[str], permissions: Optional[List[str]] = None):
-    async def check_role(payload: dict = Depends(ValidateJWT), session: AsyncSession= Depends(get_session)):
+    async def check_role(
+        request: Request,
+        payload: dict = Depends(ValidateJWT),
+        session: AsyncSession= Depends(get_session)
+    ):
         if payload is None:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
         if payload.get("role") not in roles:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
         if permissions != None:
-            res  = await session.execute(select(User).where(User.id == payload.get("id"))
-                            .options(selectinload(User.user_permissions)
-                            .selectinload(UserPermission.permissions))
-                        )
-            user            = res.scalar_one_or_none()
-            userPermissions = [p.permissions.name for p in user.user_permissions]
+            userPermissions = await getUserPermissions(
+                payload.get("id"), session, getattr(request.app.state, "redis", None)
+            )
             isValid         = set(permissions).issubset(userPermissions)
 
             if not isValid:
@@ -122,17 +136,22 @@ def RBAChecker(roles: List[str], permissions: Optional[List[str]] = None):
 
 
 def generate_jwt_keys(user: User) -> dict:
+    return encodeJwtKeys(user.id, user.role.value)
+
+
+def encodeJwtKeys(user_id: int, role: str) -> dict:
     try:
         secret      = settings.jwt_secret if settings.jwt_secret != "" else ""
         access_exp  = int(settings.access_token_expire_minutes 
                         if settings.access_token_expire_minutes else 10) * 60
         refresh_exp = int(settings.refresh_token_expire_minutes 
                          if settings.refresh_token_expire_minutes else 10080) * 60
+        refresh_jti = secrets.token_urlsafe(24)
 
         access_token = jwt.encode(
             {
-                "id": user.id,
-                "role": user.role.value,
+                "id": user_id,
+                "role": role,
                 "exp": datetime.now(timezone.utc) + timedelta(seconds=access_exp)
             },
             secret,
@@ -140,15 +159,21 @@ def generate_jwt_keys(user: User) -> dict:
         )
         refresh_token = jwt.encode(
             {
-                "id": user.id,
-                "role": user.role.value,
+                "id": user_id,
+                "role": role,
+                "jti": refresh_jti,
                 "exp": datetime.now(timezone.utc) + timedelta(seconds=refresh_exp)
             },
             secret,
             algorithm="HS256"
         )
 
-        return {"accessToken": access_token, "refreshToken": refresh_token}
+        return {
+            "accessToken": access_token,
+            "refreshToken": refresh_token,
+            "refreshTokenId": refresh_jti,
+            "refreshTokenTTL": refresh_exp,
+        }
 
     except Exception as e:
         raise RuntimeError(f"JWT generation failed: {e}")
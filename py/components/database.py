@@ -1,19 +1,92 @@
 from config import settings
+from collections import Counter
+from time import perf_counter
+from fastapi import Request
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-DATABASE_URL = f"postgresql+asyncpg://{settings.db_user}:{settings.db_password}@{settings.db_host}:{settings.db_port}/{settings.db_name}"
-engine       = create_async_engine(DATABASE_URL)
+DATABASE_URL = f"postgresql+asyncpg://{settings.db_user}:{settings.db_password}@{settings.db_host}:{settings.db_port}/{settings.db_name}" \
+			   f"?prepared_statement_cache_size={settings.db_statement_cache_size}"
+
+class PoolMetrics:
+	def __init__(self):
+		self.checkouts       = 0
+		self.timeouts        = 0
+		self.wait_total      = 0.0
+		self.wait_max        = 0.0
+		self.open_sessions   = 0
+		self.route_sessions  = Counter()
+
+	def recordCheckout(self, seconds: float):
+		self.checkouts  += 1
+		self.wait_total += seconds
+		self.wait_max    = max(self.wait_max, seconds)
+
+	def snapshot(self, pool) -> dict:
+		return {
+			"pool_size": pool.size(),
+			"checked_out": pool.checkedout(),
+			"checked_in": pool.checkedin(),
+			"overflow": pool.overflow(),
+			"checkouts": self.checkouts,
+			"timeouts": self.timeouts,
+			"wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+			"wait_max_ms": round(self.wait_max * 1000, 3),
+			"open_sessions": self.open_sessions,
+			"sessions_by_route": dict(self.route_sessions.most_common()),
+		}
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+	# Times every checkout, including any wait on a saturated pool and the pre-ping
+	def connect(self):
+		start = perf_counter()
+		try:
+			return super().connect()
+		except exc.TimeoutError:
+			pool_metrics.timeouts += 1
+			raise
+		finally:
+			pool_metrics.recordCheckout(perf_counter() - start)
+
+engine       = create_async_engine(
+	DATABASE_URL,
+	poolclass=InstrumentedQueuePool,
+	pool_size=settings.db_pool_size,
+	max_overflow=settings.db_max_overflow,
+	pool_timeout=settings.db_pool_timeout,
+	pool_recycle=settings.db_pool_recycle,
+	pool_pre_ping=settings.db_pool_pre_ping,
+	connect_args={"statement_cache_size": settings.db_statement_cache_size},
+)
 SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class Base(DeclarativeBase):
 	pass
 
-async def get_session():
+def poolStatus() -> dict:
+	return pool_metrics.snapshot(engine.pool)
+
+async def get_session(request: Request):
+	# One session per request, shared by RBAChecker, helpers and the route handler
+	session = getattr(request.state, "db_session", None)
+	if session is not None:
+		yield session
+		return
+
+	route = request.scope.get("route")
+	pool_metrics.route_sessions[f"{request.method} {getattr(route, 'path', request.url.path)}"] += 1
+	pool_metrics.open_sessions += 1
 	session = SessionLocal()
+	request.state.db_session = session
 	try:
 		yield session
 	finally:
+		request.state.db_session = None
 		await session.close()
+		pool_metrics.open_sessions -= 1
 		
 from components.auth.models import *
@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import json
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+from fastapi import HTTPException, Query, status
+from fastapi_pagination import resolve_params
+from components.responses import JSONResponse
+from pydantic import BaseModel
+from redis import RedisError
+from redis.asyncio import Redis
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+
+COUNT_KEY = "pagination:count:{digest}"
+
+T = TypeVar("T")
+
+
+class CursorParams:
+    """
+    Opt-in keyset pagination. Sending `cursor` (empty for the first page) switches a list
+    endpoint from OFFSET pages to cursor pages; the total is only counted when asked for.
+    The page size is the route's fastapi_pagination `size`, routes declare
+    Depends(pagination_ctx(Page[X])) so it is resolved for both modes.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(default=None, description="Opaque cursor, empty for the first page"),
+        include_total: bool = Query(default=False),
+    ):
+        self.cursor        = cursor
+        self.include_total = include_total
+
+    @property
+    def enabled(self) -> bool:
+        return self.cursor is not None
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def encodeCursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decodeCursor(cursor: str, width: int) -> Optional[list]:
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != width:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+async def cachedCount(session: AsyncSession, redis: Optional[Redis], query: Select) -> int:
+    """COUNT(*) of the unpaginated query, shared through Redis for pagination_count_ttl seconds."""
+    count    = select(func.count()).select_from(query.order_by(None).subquery())
+    compiled = count.compile()
+    digest   = hashlib.sha1(f"{compiled}|{sorted(compiled.params.items())!r}".encode()).hexdigest()
+    key      = COUNT_KEY.format(digest=digest)
+
+    if redis is not None:
+        try:
+            cached = await redis.get(key)
+            if cached is not None:
+                return int(cached)
+        except RedisError as e:
+            print(f"Pagination count cache unavailable: {e}")
+
+    total = (await session.execute(count)).scalar_one()
+    if redis is not None:
+        try:
+            await redis.set(key, total, ex=settings.pagination_count_ttl)
+        except RedisError as e:
+            print(f"Pagination count cache unavailable: {e}")
+    return total
+
+
+async def cursorPaginate(
+    session: AsyncSession,
+    query: Select,
+    keys: Sequence[Any],
+    schema: type,
+    params: CursorParams,
+    redis: Optional[Redis] = None,
+    transformer: Optional[Callable] = None,
+) -> JSONResponse:
+    """
+    Seeks past the cursor on `keys` (ascending, unique together, e.g. (Tickers.name, Tickers.id))
+    and reads size + 1 rows, so every page costs the same however deep it is.
+    """
+    size   = resolve_params().size
+    values = decodeCursor(params.cursor, len(keys))
+    stmt   = query.order_by(None).order_by(*keys).limit(size + 1)
+
+    if values is not None:
+        stmt = stmt.where(keys[0] > values[0] if len(keys) == 1 else tuple_(*keys) > tuple_(*values))
+
+    result = await session.execute(stmt)
+    items  = result.unique().scalars().all()
+    more   = len(items) > size
+    items  = items[:size]
+
+    next_cursor = encodeCursor([getattr(items[-1], key.key) for key in keys]) if more else None
+    total       = await cachedCount(session, redis, query) if params.include_total else None
+
+    if transformer is not None:
+        items = await transformer(items)
+
+    page = CursorPage[schema].model_validate(
+        {"items": items, "size": size, "next_cursor": next_cursor, "total": total},
+        from_attributes=True
+    )
+    return JSONResponse(status_code=status.HTTP_200_OK, content=page.model_dump(mode="json"))
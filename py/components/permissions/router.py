@@ -1,15 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from components.responses import JSONResponse
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlalchemy import paginate
-from fastapi.encoders import jsonable_encoder
 from sqlalchemy import select, text, func, update, String
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from components.database import get_session
 from components.auth.utils import RBAChecker, ValidateJWT
-from fastapi.encoders import jsonable_encoder
 from components.auth.models import Permission, UserPermission
+from .utils import invalidateUserPermissions, invalidateAllPermissions
 from .schemas import (
     AddPermission,
     UpdatePermission,
@@ -53,6 +52,7 @@ async def get_permissions_for_user(id: int, session: AsyncSession = Depends(get_
 )
 async def add_permission(
     body: AddPermission, 
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     try:
@@ -63,6 +63,7 @@ async def add_permission(
         new_permission = Permission(name=body.name, description=body.description)
         session.add(new_permission)
         await session.commit()
+        await invalidateAllPermissions(request.app.state.redis)
         return {"success": True, "message": "Successfully added permission", "data": body}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -73,6 +74,7 @@ async def add_permission(
 )
 async def update_permission(
     body: UpdatePermission, 
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     try:
@@ -84,6 +86,7 @@ async def update_permission(
         permission.description = body.description
         session.add(permission)
         await session.commit()
+        await invalidateAllPermissions(request.app.state.redis)
         return {"success": True, "message": "Successfully updated permission", "data": body}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -93,7 +96,11 @@ async def update_permission(
     "/delete",
     dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
 )
-async def delete_permission(body: DeletePermission, session: AsyncSession = Depends(get_session)):
+async def delete_permission(
+    body: DeletePermission, 
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
     try:
         permission = await session.get(Permission, body.id)
         if not permission:
@@ -101,6 +108,7 @@ async def delete_permission(body: DeletePermission, session: AsyncSession = Depe
 
         await session.delete(permission)
         await session.commit()
+        await invalidateAllPermissions(request.app.state.redis)
         return {"success": True, "message": "Successfully deleted permission", "data": body}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -113,6 +121,7 @@ async def delete_permission(body: DeletePermission, session: AsyncSession = Depe
 )
 async def add_permission_to_user(
     body: PermissionUserLink, 
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     try:
@@ -133,6 +142,7 @@ async def add_permission_to_user(
         link = UserPermission(user_id=body.userId, permission_id=body.permissionId)
         session.add(link)
         await session.commit()
+        await invalidateUserPermissions(request.app.state.redis, body.userId)
         return {
             "success": True,
             "message": "Successfully added permission to user",
@@ -148,6 +158,7 @@ async def add_permission_to_user(
 )
 async def delete_permission_from_user(
     body: PermissionUserLink, 
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     try:
@@ -163,6 +174,7 @@ async def delete_permission_from_user(
 
         await session.delete(link)
         await session.commit()
+        await invalidateUserPermissions(request.app.state.redis, body.userId)
         return {
             "success": True,
             "message": "Successfully removed permission from user",
@@ -1,3 +1,67 @@
+import json
+from typing import FrozenSet
+from redis import RedisError
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from components.auth.models import Permission, UserPermission
+from components.utils import TTLCache
+from config import settings
 
-        
-    
+PERMISSIONS_KEY = "permissions:user:{user_id}"
+
+permission_cache = TTLCache(maxsize=settings.permission_cache_size, ttl=settings.permission_cache_ttl)
+
+
+async def getUserPermissions(user_id: int, session: AsyncSession, redis: Redis | None) -> FrozenSet[str]:
+    """Permission names for a user, read from the in-process LRU, then Redis, then Postgres."""
+    cached = permission_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    key = PERMISSIONS_KEY.format(user_id=user_id)
+    if redis is not None:
+        try:
+            payload = await redis.get(key)
+            if payload is not None:
+                names = frozenset(json.loads(payload))
+                permission_cache.set(user_id, names)
+                return names
+        except RedisError as e:
+            print(f"Permission cache read failed: {e}")
+
+    result = await session.execute(
+        select(Permission.name)
+        .join(UserPermission, UserPermission.permission_id == Permission.id)
+        .where(UserPermission.user_id == user_id)
+    )
+    names = frozenset(result.scalars().all())
+
+    permission_cache.set(user_id, names)
+    if redis is not None:
+        try:
+            await redis.set(key, json.dumps(sorted(names)), ex=settings.permission_cache_redis_ttl)
+        except RedisError as e:
+            print(f"Permission cache write failed: {e}")
+    return names
+
+
+async def invalidateUserPermissions(redis: Redis | None, user_id: int):
+    permission_cache.pop(user_id)
+    if redis is not None:
+        try:
+            await redis.delete(PERMISSIONS_KEY.format(user_id=user_id))
+        except RedisError as e:
+            print(f"Permission cache invalidation failed: {e}")
+
+
+async def invalidateAllPermissions(redis: Redis | None):
+    # Used when a permission definition changes, which can affect any user
+    permission_cache.clear()
+    if redis is not None:
+        try:
+            keys = [key async for key in redis.scan_iter(match=PERMISSIONS_KEY.format(user_id="*"), count=500)]
+            if keys:
+                await redis.unlink(*keys)
+        except RedisError as e:
+            print(f"Permission cache invalidation failed: {e}")
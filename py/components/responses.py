@@ -0,0 +1,39 @@
+from datetime import date, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    # Only reached for types orjson can't encode itself, output matches jsonable_encoder
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (date, time)):
+        # pandas Timestamp and other datetime subclasses, NaT is a datetime too
+        return None if obj != obj else obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """orjson with NumPy arrays and scalars, Decimals, datetimes and pydantic models; NaN becomes null."""
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class JSONResponse(ORJSONResponse):
+    """App-wide response class, content is encoded in C without a jsonable_encoder pass."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,87 @@
+from decimal import Decimal
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET      = "application/vnd.apache.parquet"
+
+# Accepted media types -> output format
+FORMATS = {
+    ARROW_STREAM: "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    PARQUET: "parquet",
+    "application/x-parquet": "parquet",
+}
+
+
+def negotiateFormat(accept: str) -> Optional[str]:
+    """'arrow' or 'parquet' when the Accept header asks for one of them, None for JSON."""
+    for media in accept.split(","):
+        fmt = FORMATS.get(media.split(";")[0].strip().lower())
+        if fmt:
+            return fmt
+    return None
+
+
+def _requirePyarrow():
+    if pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="Arrow and Parquet output are not available on this server"
+        )
+
+
+def columnarTable(columns: Dict[str, np.ndarray], indicators: Dict[str, np.ndarray]) -> "pa.Table":
+    """
+    Table over the columnar arrays with the JSON field names. Numeric columns are wrapped
+    without copying, so missing values stay NaN instead of becoming nulls.
+    """
+    _requirePyarrow()
+    arrays = {}
+    for name, values in {**columns, **indicators}.items():
+        if name == "timestamp":
+            values = values.astype("datetime64[ms]", copy=False)
+        arrays[name.title()] = pa.array(values) if values.dtype != object else pa.array(values.tolist())
+    return pa.table(arrays)
+
+
+def recordsTable(rows: Sequence[Mapping], fields: Sequence[Tuple[str, str]]) -> "pa.Table":
+    """
+    Table from row mappings with a fixed schema of (name, pyarrow type alias) pairs, so an
+    empty result still has every column. Decimals become float64.
+    """
+    _requirePyarrow()
+    arrays = []
+    for name, alias in fields:
+        values = [row[name] for row in rows]
+        if alias == "double":
+            values = [float(value) if isinstance(value, Decimal) else value for value in values]
+        arrays.append(pa.array(values, type=pa.type_for_alias(alias)))
+    return pa.Table.from_arrays(arrays, names=[name for name, _ in fields])
+
+
+def tableResponse(table: "pa.Table", fmt: str, filename: str = "data") -> Response:
+    _requirePyarrow()
+    sink = pa.BufferOutputStream()
+
+    if fmt == "parquet":
+        pq.write_table(table, sink, compression="zstd")
+        media_type, extension = PARQUET, "parquet"
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        media_type, extension = ARROW_STREAM, "arrows"
+
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
@@ -0,0 +1,105 @@
+import asyncio
+import bcrypt
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from config import settings
+
+
+class HashingPool:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool so the event loop never blocks on it.
+    At most `workers + max_pending` calls are admitted, callers beyond that wait up to
+    `wait_timeout` seconds for a slot and are then rejected with a 503.
+    """
+
+    def __init__(self, workers: int, max_pending: int, wait_timeout: float):
+        self.workers      = workers
+        self.max_pending  = max_pending
+        self.wait_timeout = wait_timeout
+        self._executor    = None
+        self._slots       = None
+        self.in_flight    = 0
+        self.max_depth    = 0
+        self.completed    = 0
+        self.rejected     = 0
+        self.wait_total   = 0.0
+        self.run_total    = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.max_pending)
+        return self._slots
+
+    async def run(self, fn, *args):
+        started = perf_counter()
+        try:
+            await asyncio.wait_for(self.slots.acquire(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"success": False, "error": "Server is busy, please try again."},
+                headers={"Retry-After": "1"}
+            )
+
+        self.in_flight += 1
+        self.max_depth  = max(self.max_depth, self.in_flight)
+        try:
+            queued = perf_counter()
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+            self.run_total += perf_counter() - queued
+            return result
+        finally:
+            self.in_flight  -= 1
+            self.completed  += 1
+            self.wait_total += perf_counter() - started
+            self.slots.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": max(self.in_flight - self.workers, 0),
+            "max_depth": self.max_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_latency_ms": round(self.wait_total / self.completed * 1000, 3) if self.completed else 0.0,
+            "avg_run_ms": round(self.run_total / self.completed * 1000, 3) if self.completed else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=settings.hash_workers,
+    max_pending=settings.hash_max_pending,
+    wait_timeout=settings.hash_wait_timeout,
+)
+
+
+def _hash(secret: bytes) -> str:
+    return bcrypt.hashpw(secret, bcrypt.gensalt()).decode("utf-8")
+
+
+def _check(secret: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(secret, hashed)
+
+
+async def hashSecret(secret: str) -> str:
+    return await hashing_pool.run(_hash, secret.encode())
+
+
+async def checkSecret(secret: str, hashed: str) -> bool:
+    return await hashing_pool.run(_check, secret.encode(), hashed.encode())
@@ -1,83 +1,377 @@
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from functools import cached_property
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from components.stats.utils import setHistoricalDFColTypes
 
+
+def _rollingMean(values: np.ndarray, period: int) -> np.ndarray:
+    """Trailing mean over `period` values, NaN until the window is full or holds a NaN."""
+    size = values.shape[0]
+    out  = np.full(size, np.nan)
+    if period < 1 or size < period:
+        return out
+
+    missing = np.isnan(values)
+    holes   = missing.any()
+    filled  = np.where(missing, 0.0, values) if holes else values
+    # Offsetting by the first value keeps the running sums small and precise
+    offset  = filled[0]
+    sums    = np.cumsum(filled - offset)
+    window  = np.empty(size - period + 1)
+    window[0]  = sums[period - 1]
+    window[1:] = sums[period:] - sums[:-period]
+    out[period - 1:] = window / period + offset
+
+    if holes:
+        counts = np.cumsum(missing)
+        gaps   = np.empty(size - period + 1, dtype=bool)
+        gaps[0]  = counts[period - 1] > 0
+        gaps[1:] = (counts[period:] - counts[:-period]) > 0
+        out[period - 1:][gaps] = np.nan
+    return out
+
+
+def _rollingStd(values: np.ndarray, period: int) -> np.ndarray:
+    """Trailing sample standard deviation over `period` values."""
+    out = np.full(values.shape[0], np.nan)
+    if period < 2 or values.shape[0] < period:
+        return out
+
+    out[period - 1:] = sliding_window_view(values, period).std(axis=1, ddof=1)
+    return out
+
+
+# Requestable indicators: NAME -> (engine method, ((spec key, method kwarg, default), ...))
+INDICATOR_REGISTRY: Dict[str, Tuple[str, Tuple[Tuple[str, str, int], ...]]] = {
+    "MA":         ("MA",         (("period", "period", 20),)),
+    "EMA":        ("EMA",        (("period", "period", 14),)),
+    "RSI":        ("RSI",        (("period", "period", 14),)),
+    "ATR":        ("ATR",        (("period", "period", 14),)),
+    "MACD":       ("MACD",       (("fast", "fast_period", 12),
+                                  ("slow", "slow_period", 26),
+                                  ("signal", "signal_period", 9))),
+    "RETURN":     ("RETURNS",    ()),
+    "VOLATILITY": ("VOLATILITY", ()),
+}
+
+
+def normalizeIndicators(indicators: List[Dict[str, any]]) -> List[Dict[str, any]]:
+    """
+    Upper-cases names, casts parameters to positive ints with registry defaults and
+    drops repeated specs, so {"name": "ma", "period": "20"} and {"name": "MA", "period": 20}
+    are computed once. Raises ValueError on unknown names or bad parameters.
+    """
+    normalized = []
+    seen       = set()
+
+    for indicator in indicators:
+        name = str(indicator.get("name", "")).strip().upper()
+        if name not in INDICATOR_REGISTRY:
+            raise ValueError(f"Unknown indicator '{indicator.get('name')}'")
+
+        spec = {"name": name}
+        for key, _, default in INDICATOR_REGISTRY[name][1]:
+            value = indicator.get(key, default)
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Indicator {name} parameter '{key}' must be an integer")
+            if value < 1:
+                raise ValueError(f"Indicator {name} parameter '{key}' must be positive")
+            spec[key] = value
+
+        identity = tuple(spec.items())
+        if identity not in seen:
+            seen.add(identity)
+            normalized.append(spec)
+    return normalized
+
+
+class IndicatorEngine:
+    """
+    Computes a batch of indicators over contiguous float64 arrays.
+    Intermediates shared between indicators (close diff, pct change, true range, EMAs)
+    are computed once per engine, so EMA 12 and MACD 12/26/9 run the 12 span EMA once.
+    Outputs keep NaN so conversion happens at serialization.
+
+    When computing one chunk of a longer series, `warm` leading rows are the previous chunk's
+    tail and `seeds` holds the last value of every recursive filter (EMA, MACD signal); the
+    filters continue from their seed and the seeds are updated in place for the next chunk.
+
+    `starts` splits the arrays into independent series (e.g. one per ticker) computed in the
+    same pass: windows never reach across a start and each series' filters restart there.
+    """
+
+    def __init__(
+        self,
+        close: np.ndarray,
+        high: np.ndarray = None,
+        low: np.ndarray = None,
+        warm: int = 0,
+        seeds: Dict[tuple, Tuple[float, int]] = None,
+        starts: np.ndarray = None
+    ):
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.high  = None if high is None else np.ascontiguousarray(high, dtype=np.float64)
+        self.low   = None if low is None else np.ascontiguousarray(low, dtype=np.float64)
+        self.warm  = warm
+        self.seeds = {} if seeds is None else seeds
+        self.starts = None
+        self.series = None
+        self._emas  = {}
+
+        if starts is not None and len(starts) > 1:
+            self.starts = np.asarray(starts, dtype=np.int64)
+            lengths     = np.diff(np.append(self.starts, self.close.shape[0]))
+            self.series = np.repeat(np.arange(lengths.shape[0]), lengths)
+
+    @cached_property
+    def prevClose(self) -> np.ndarray:
+        prev     = np.empty_like(self.close)
+        prev[0]  = np.nan
+        prev[1:] = self.close[:-1]
+        if self.starts is not None:
+            prev[self.starts] = np.nan
+        return prev
+
+    def _rolling(self, values: np.ndarray, period: int) -> np.ndarray:
+        out = _rollingMean(values, period)
+        if self.starts is not None:
+            # Windows ending in the first period - 1 rows of a series reach into the previous one
+            for start in self.starts[1:]:
+                out[start:start + period - 1] = np.nan
+        return out
+
+    @cached_property
+    def delta(self) -> np.ndarray:
+        return self.close - self.prevClose
+
+    @cached_property
+    def pctChange(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.close / self.prevClose - 1
+
+    @cached_property
+    def gains(self) -> np.ndarray:
+        return np.where(self.delta > 0, self.delta, 0.0)
+
+    @cached_property
+    def losses(self) -> np.ndarray:
+        return np.where(self.delta < 0, -self.delta, 0.0)
+
+    @cached_property
+    def trueRange(self) -> np.ndarray:
+        return np.fmax(
+            self.high - self.low,
+            np.fmax(np.abs(self.high - self.prevClose), np.abs(self.low - self.prevClose))
+        )
+
+    def _ewm(self, key: tuple, values: np.ndarray, span: int) -> np.ndarray:
+        # The recursive filter has no closed vectorized form, pandas runs it in Cython
+        if self.series is not None:
+            # Rows of a series are contiguous, so the grouped result keeps the input order
+            return pd.Series(values, copy=False) \
+                        .groupby(self.series, sort=False) \
+                        .ewm(span=span, adjust=False) \
+                        .mean() \
+                        .to_numpy()
+
+        seed = self.seeds.get(key)
+        if seed is None:
+            out = pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+        else:
+            # With adjust=False the last value followed by the NaNs after it continues the filter exactly
+            last, gaps = seed
+            head = np.full(gaps + 1, np.nan)
+            head[0] = last
+            out  = np.full(values.shape[0], np.nan)
+            out[self.warm:] = pd.Series(np.concatenate((head, values[self.warm:])), copy=False) \
+                                .ewm(span=span, adjust=False) \
+                                .mean() \
+                                .to_numpy()[gaps + 1:]
+        if out.shape[0] > self.warm:
+            valid = np.flatnonzero(~np.isnan(values[self.warm:]))
+            gaps  = values.shape[0] - self.warm - 1 - valid[-1] if valid.size else \
+                        (seed[1] if seed is not None else 0) + values.shape[0] - self.warm
+            self.seeds[key] = (out[-1], int(gaps))
+        return out
+
+    def ema(self, period: int) -> np.ndarray:
+        if period not in self._emas:
+            self._emas[period] = self._ewm(("EMA", period), self.close, period)
+        return self._emas[period]
+
+    def MA(self, period: int = 20) -> Dict[str, np.ndarray]:
+        return {f"MA_{period}": self._rolling(self.close, period).round(2)}
+
+    def RSI(self, period: int = 14) -> Dict[str, np.ndarray]:
+        avg_gain = self._rolling(self.gains, period)
+        avg_loss = self._rolling(self.losses, period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        return {f"RSI_{period}": rsi.round(2)}
+
+    def ATR(self, period: int = 14) -> Dict[str, np.ndarray]:
+        return {f"ATR_{period}": self._rolling(self.trueRange, period).round(2)}
+
+    def EMA(self, period: int = 14) -> Dict[str, np.ndarray]:
+        return {f"EMA_{period}": self.ema(period)}
+
+    def MACD(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> Dict[str, np.ndarray]:
+        macd   = self.ema(fast_period) - self.ema(slow_period)
+        signal = self._ewm(("MACD", fast_period, slow_period, signal_period), macd, signal_period)
+        # The default parameters keep the historical MACD column names
+        prefix = "MACD" if (fast_period, slow_period, signal_period) == (12, 26, 9) \
+                    else f"MACD_{fast_period}_{slow_period}_{signal_period}"
+        return {prefix: macd, f"{prefix}_signal": signal, f"{prefix}_hist": macd - signal}
+
+    def RETURNS(self) -> Dict[str, np.ndarray]:
+        return {"returns": self.pctChange.round(5)}
+
+    def VOLATILITY(self, period: int = 14) -> Dict[str, np.ndarray]:
+        return {"volatility": _rollingStd(self.pctChange, period).round(5)}
+
+    def compute(self, indicators: List[Dict[str, any]]) -> Dict[str, np.ndarray]:
+        out = {}
+        if self.close.shape[0] == 0:
+            return out
+
+        for spec in normalizeIndicators(indicators):
+            method, params = INDICATOR_REGISTRY[spec["name"]]
+            out.update(getattr(self, method)(**{kwarg: spec[key] for key, kwarg, _ in params}))
+        return out
+
+
 class Indicators:
 
     def __init__(
-        self, 
-        df: pd.DataFrame, 
+        self,
+        df: pd.DataFrame,
         indicators: List[Dict[str, any]]
     ):
-        self.df         = df.copy()
+        self.df         = df
         self.indicators = indicators
-    
+        self.columns    = []
+        self._engine_   = None
+
     def processIndicators(self):
 
         if self.df.shape[0] == 0:
             return
 
-        for indicator in self.indicators:
-            if indicator.get("name").upper() == "MA":
-                self.MA(int(indicator.get("period")))
-            if indicator.get("name").upper() == "RSI":
-                 self.RSI(int(indicator.get("period")))
-            if indicator.get("name").upper() == "ATR":
-                 self.ATR(int(indicator.get("period")))
-            if indicator.get("name").upper() == "RETURN":
-                 self.RETURNS()
-            if indicator.get("name").upper() == "VOLATILITY":
-                 self.VOLATILITY()
-                 
+        self._assign(self._engine().compute(self.indicators))
+
+    def _engine(self) -> IndicatorEngine:
+        if self._engine_ is None:
+            self._engine_ = IndicatorEngine(
+                pd.to_numeric(self.df["close"]).to_numpy(dtype=np.float64),
+                pd.to_numeric(self.df["high"]).to_numpy(dtype=np.float64),
+                pd.to_numeric(self.df["low"]).to_numpy(dtype=np.float64),
+            )
+        return self._engine_
+
+    def _assign(self, columns: Dict[str, np.ndarray]):
+        # A single assign keeps the frame from being rebuilt once per indicator
+        self.df       = self.df.assign(**columns)
+        self.columns += [name for name in columns if name not in self.columns]
+
     def MA(self, period: int = 20):
-        self.df[f"MA_{period}"] = self.df['close'] \
-                        .rolling(window=period) \
-                        .mean() \
-                        .round(decimals=2)
-        self.df[f"MA_{period}"] = self.df[f"MA_{period}"].replace({np.nan: None})
-    
+        self._assign(self._engine().MA(period))
+
     def RSI(self, period: int = 14):
-        delta    = self.df['close'].diff()
-        gain     = delta.where(delta > 0, 0)
-        loss     = -delta.where(delta < 0, 0)
-        avg_gain = gain.rolling(window=period, min_periods=period).mean()
-        avg_loss = loss.rolling(window=period, min_periods=period).mean()
-        rs       = avg_gain / avg_loss
-        self.df[f'RSI_{period}'] = (100 - (100 / (1 + rs))).round(2)
-        self.df[f'RSI_{period}'] = self.df[f'RSI_{period}'].replace({np.nan: None})
+        self._assign(self._engine().RSI(period))
 
     def ATR(self, period: int = 14):
-        high_low    = self.df['high'] - self.df['low']
-        high_close  = (self.df['high'] - self.df['close'].shift()).abs()
-        low_close   = (self.df['low'] - self.df['close'].shift()).abs()
-        tr          = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        self.df[f'ATR_{period}'] = tr.rolling(window=period, min_periods=period).mean().round(2)
-        self.df[f'ATR_{period}'] = self.df[f'ATR_{period}'].replace({np.nan: None})
+        self._assign(self._engine().ATR(period))
 
     def EMA(self, period: int = 14):
-        self.df[f'EMA_{period}'] = self.df['close'].ewm(span=period, adjust=False).mean().replace({np.nan: None})
+        self._assign(self._engine().EMA(period))
 
     def MACD(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
-        ema_fast = self.df['close'].ewm(span=fast_period, adjust=False).mean()
-        ema_slow = self.df['close'].ewm(span=slow_period, adjust=False).mean()
-        macd = ema_fast - ema_slow
-        signal = macd.ewm(span=signal_period, adjust=False).mean()
-
-        self.df['MACD'] = macd
-        self.df['MACD_signal'] = signal
-        self.df['MACD_hist'] = macd - signal
-    
+        self._assign(self._engine().MACD(fast_period, slow_period, signal_period))
+
     def RETURNS(self):
-        self.df["returns"] = self.df["close"].pct_change()
-        self.df["returns"] = pd.to_numeric(self.df["returns"])
-        self.df["returns"] = self.df["returns"].round(5)
-        self.df["returns"] = self.df["returns"].replace({np.nan: None})
-    
+        self._assign(self._engine().RETURNS())
+
     def VOLATILITY(self, period: int = 14):
-        self.df['volatility']  =  self.df['close'].pct_change().rolling(period).std()
-        self.df["volatility"]  = self.df["volatility"].round(5).replace({np.nan: None})
+        self._assign(self._engine().VOLATILITY(period))
 
     def getDf(self):
+        if self.columns:
+            # NaN -> None happens once here, right before the frame is serialized
+            block = self.df[self.columns]
+            self.df[self.columns] = block.astype(object).where(block.notna(), None)
         return setHistoricalDFColTypes(self.df)
-    
\ No newline at end of file
+
+
+class IndicatorStream:
+    """
+    Computes indicators chunk by chunk with the same output as a single pass over the range.
+    The last `lookback` rows of every chunk are kept and prepended to the next one so windowed
+    indicators (MA, RSI, ATR, VOLATILITY, RETURN) see full windows, recursive ones carry seeds.
+    """
+
+    def __init__(self, indicators: List[Dict[str, any]]):
+        self.indicators = normalizeIndicators(indicators)
+        self.lookback   = max((self._lookback(spec) for spec in self.indicators), default=0)
+        self.seeds      = {}
+        self.tail       = None
+
+    @staticmethod
+    def _lookback(spec: Dict[str, any]) -> int:
+        periods = [value for key, value in spec.items() if key != "name"]
+        if spec["name"] == "VOLATILITY":
+            periods.append(14)
+        # One more row than the longest window for the close diff / previous close
+        return max(periods, default=1) + 1
+
+    def push(self, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> Dict[str, np.ndarray]:
+        if close.shape[0] == 0:
+            return {}
+
+        warm = 0
+        if self.tail is not None:
+            warm = self.tail[0].shape[0]
+            close, high, low = (np.concatenate((tail, values)) for tail, values in zip(self.tail, (close, high, low)))
+
+        engine    = IndicatorEngine(close, high, low, warm=warm, seeds=self.seeds)
+        out       = {name: values[warm:] for name, values in engine.compute(self.indicators).items()}
+        self.tail = tuple(values[max(values.shape[0] - self.lookback, 0):] for values in (close, high, low))
+        return out
+
+
+def computeBatchIndicators(
+    segments: List[Dict[str, np.ndarray]],
+    indicators: List[List[Dict[str, any]]]
+) -> List[Dict[str, np.ndarray]]:
+    """
+    Indicators for many columnar series at once. Series asking for the same (normalized)
+    indicators are concatenated and computed by one IndicatorEngine, then split back as views.
+    """
+    out    = [{} for _ in segments]
+    groups = {}
+    for position, (columns, specs) in enumerate(zip(segments, indicators)):
+        if columns["close"].shape[0]:
+            groups.setdefault(tuple(tuple(spec.items()) for spec in specs), []).append(position)
+
+    for members in groups.values():
+        lengths  = [segments[position]["close"].shape[0] for position in members]
+        starts   = np.cumsum([0] + lengths[:-1])
+        engine   = IndicatorEngine(
+            *(np.concatenate([segments[position][name] for position in members]) for name in ("close", "high", "low")),
+            starts=starts
+        )
+        computed = engine.compute(indicators[members[0]])
+        for position, start, length in zip(members, starts, lengths):
+            out[position] = {name: values[start:start + length] for name, values in computed.items()}
+    return out
+
+
+def computeColumnarIndicators(
+    columns: Dict[str, np.ndarray],
+    indicators: List[Dict[str, any]]
+) -> Dict[str, np.ndarray]:
+    """Indicators for the columnar path, computed as float64 arrays with NaN left in place."""
+    return IndicatorEngine(columns["close"], columns["high"], columns["low"]).compute(indicators)
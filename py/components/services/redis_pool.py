@@ -0,0 +1,33 @@
+from typing import Any, Iterable, Tuple
+from redis.asyncio import Redis, ConnectionPool
+from config import settings
+
+
+def createRedisPool() -> ConnectionPool:
+    return ConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        password=settings.redis_password,
+        max_connections=settings.redis_max_connections,
+        health_check_interval=settings.redis_health_check_interval,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_timeout,
+        retry_on_timeout=True,
+        decode_responses=False,
+    )
+
+
+async def pipelined(
+    redis: Redis,
+    commands: Iterable[Tuple[Any, ...]],
+    transaction: bool = False
+) -> list:
+    """
+    Sends (command, *args) tuples in a single round-trip and returns their results in order,
+    e.g. await pipelined(redis, [("get", key), ("incr", counter)]).
+    """
+    async with redis.pipeline(transaction=transaction) as pipe:
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        return await pipe.execute()
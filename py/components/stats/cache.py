@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import struct
+from datetime import date
+from typing import Dict, Iterable, Optional, Set, Tuple
+import asyncpg
+import numpy as np
+import pandas as pd
+from redis.asyncio import Redis
+from redis import RedisError
+from config import settings
+from components.services.redis_pool import pipelined
+
+DATA_KEY       = "stats:data:{ticker_id}:{epoch}.{generation}:{digest}"
+GENERATION_KEY = "stats:gen:{ticker_id}"
+EPOCH_KEY      = "stats:epoch"
+HITS_KEY       = "stats:cache:hits"
+MISSES_KEY     = "stats:cache:misses"
+WRITES_KEY     = "stats:cache:writes"
+BYTES_KEY      = "stats:cache:bytes"
+NOTIFY_CHANNEL = "historical_inserted"
+MAGIC          = b"AWC1"
+
+# Seconds per Historical.duration unit, durations are stored as "<multiplier> <timespan>"
+DURATION_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+    "month": 2592000,
+    "quarter": 7776000,
+    "year": 31536000,
+}
+
+ColumnSet = Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]
+
+# Whether this worker currently receives historical insert notifications. Without them a
+# closed window can't be invalidated, so it is cached with the short TTL instead
+_listening = False
+
+
+def packColumns(columns: Dict[str, np.ndarray], indicators: Dict[str, np.ndarray]) -> bytes:
+    """
+    Binary layout: MAGIC | uint32 header length | JSON header | raw column buffers.
+    Object columns are dictionary encoded as int32 codes plus their categories.
+    """
+    header  = {"indicators": list(indicators), "columns": []}
+    buffers = []
+
+    for name, values in {**columns, **indicators}.items():
+        if values.dtype == object:
+            codes, categories = pd.factorize(values, use_na_sentinel=True)
+            values = codes.astype(np.int32)
+            header["columns"].append({"name": name, "dtype": "category",
+                                      "categories": categories.tolist()})
+        else:
+            header["columns"].append({"name": name, "dtype": values.dtype.str})
+        buffers.append(np.ascontiguousarray(values).tobytes())
+
+    header["size"] = len(next(iter(columns.values()))) if columns else 0
+    encoded        = json.dumps(header, separators=(",", ":")).encode()
+    return MAGIC + struct.pack("<I", len(encoded)) + encoded + b"".join(buffers)
+
+
+def unpackColumns(payload: bytes) -> ColumnSet:
+    if payload[:4] != MAGIC:
+        raise ValueError("Unrecognized stats cache payload")
+
+    length     = struct.unpack_from("<I", payload, 4)[0]
+    header     = json.loads(payload[8:8 + length])
+    offset     = 8 + length
+    size       = header["size"]
+    columns    = {}
+    indicators = {}
+
+    for column in header["columns"]:
+        dtype  = np.dtype(np.int32) if column["dtype"] == "category" else np.dtype(column["dtype"])
+        values = np.frombuffer(payload, dtype=dtype, count=size, offset=offset)
+        offset += dtype.itemsize * size
+
+        if column["dtype"] == "category":
+            categories = np.array(column["categories"] + [None], dtype=object)
+            values     = categories[values]
+
+        target = indicators if column["name"] in header["indicators"] else columns
+        target[column["name"]] = values
+    return columns, indicators
+
+
+def barSeconds(durations: np.ndarray) -> Optional[int]:
+    seconds = []
+    for duration in pd.unique(durations):
+        try:
+            multiplier, timespan = str(duration).split()
+            seconds.append(int(multiplier) * DURATION_SECONDS[timespan.lower().rstrip("s")])
+        except (KeyError, ValueError):
+            continue
+    return min(seconds) if seconds else None
+
+
+def cacheTTL(params, columns: Dict[str, np.ndarray]) -> int:
+    # Closed windows only change through invalidation, open ones expire with the next bar
+    if not _listening:
+        return settings.stats_cache_min_ttl
+    if params.to_date < date.today():
+        return settings.stats_cache_max_ttl
+
+    seconds = barSeconds(columns["duration"]) or settings.stats_cache_min_ttl
+    return max(settings.stats_cache_min_ttl, min(seconds, settings.stats_cache_max_ttl))
+
+
+def _digest(params) -> str:
+    identity = json.dumps({
+        "source": params.source,
+        "from": params.from_date.isoformat(),
+        "to": params.to_date.isoformat(),
+        "indicators": params.indicators,
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+async def _read(redis: Redis, params) -> Tuple[str, Optional[bytes]]:
+    epoch, generation = await redis.mget(EPOCH_KEY, GENERATION_KEY.format(ticker_id=params.ticker_id))
+    key     = DATA_KEY.format(ticker_id=params.ticker_id,
+                              epoch=int(epoch or 0),
+                              generation=int(generation or 0),
+                              digest=_digest(params))
+    payload = await redis.get(key)
+    await redis.incr(HITS_KEY if payload is not None else MISSES_KEY)
+    return key, payload
+
+
+async def readCachedColumns(redis: Redis, params) -> Tuple[Optional[str], Optional[ColumnSet]]:
+    """Returns the cache key for the current ticker generation and the cached columns on a hit."""
+    if not settings.stats_cache_enabled or redis is None:
+        return None, None
+    try:
+        key, payload = await _read(redis, params)
+        return key, unpackColumns(payload) if payload is not None else None
+    except (RedisError, ValueError) as e:
+        print(f"Stats cache read failed: {e}")
+        return None, None
+
+
+async def writeCachedColumns(
+    redis: Redis,
+    key: Optional[str],
+    params,
+    columns: Dict[str, np.ndarray],
+    indicators: Dict[str, np.ndarray]
+):
+    if key is None:
+        return
+    try:
+        payload = packColumns(columns, indicators)
+        await pipelined(redis, [
+            ("set", key, payload, cacheTTL(params, columns)),
+            ("incr", WRITES_KEY),
+            ("incrby", BYTES_KEY, len(payload)),
+        ])
+    except RedisError as e:
+        print(f"Stats cache write failed: {e}")
+
+
+async def invalidateTickers(redis: Redis, ticker_ids: Iterable[int]):
+    # Bumping the generation orphans every cached window for the ticker, TTLs clean them up
+    try:
+        await pipelined(redis, [("incr", GENERATION_KEY.format(ticker_id=ticker_id)) for ticker_id in ticker_ids])
+    except RedisError as e:
+        print(f"Stats cache invalidation failed: {e}")
+
+
+async def invalidateAll(redis: Redis):
+    # Notifications may have been missed while the listener was down, orphan every window
+    try:
+        await redis.incr(EPOCH_KEY)
+    except RedisError as e:
+        print(f"Stats cache invalidation failed: {e}")
+
+
+async def cacheStats(redis: Redis) -> dict:
+    counters, memory = await pipelined(redis, [
+        ("mget", HITS_KEY, MISSES_KEY, WRITES_KEY, BYTES_KEY),
+        ("info", "memory"),
+    ])
+    hits, misses, writes, size = (int(value or 0) for value in counters)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "writes": writes,
+        "avg_entry_bytes": size // writes if writes else 0,
+        "used_memory": memory.get("used_memory"),
+        "maxmemory": memory.get("maxmemory"),
+    }
+
+
+async def _flushInvalidations(redis: Redis, dirty: Set[int]):
+    # The ingest inserts one bar per statement, so notifications are coalesced per ticker
+    while True:
+        await asyncio.sleep(settings.stats_cache_invalidate_delay_ms / 1000)
+        if dirty:
+            ticker_ids = list(dirty)
+            dirty.clear()
+            await invalidateTickers(redis, ticker_ids)
+
+
+async def listenForHistoricalInserts(redis: Redis):
+    """
+    LISTEN on the channel fed by the historical insert trigger and bump the generation of every
+    ticker that received bars, so new bars from any writer invalidate cached windows. Runs for
+    the lifetime of the app, reconnecting whenever the connection is lost.
+    """
+    global _listening
+    dirty      = set()
+    flusher    = asyncio.create_task(_flushInvalidations(redis, dirty))
+    recovering = False
+
+    def _collect(connection, pid, channel, payload):
+        if payload.isdigit():
+            dirty.add(int(payload))
+
+    try:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(
+                    user=settings.db_user,
+                    password=settings.db_password,
+                    host=settings.db_host,
+                    port=settings.db_port,
+                    database=settings.db_name,
+                    timeout=settings.stats_cache_listener_timeout,
+                )
+                await connection.add_listener(NOTIFY_CHANNEL, _collect)
+                if recovering:
+                    await invalidateAll(redis)
+                _listening = True
+                print("Historical insert listener connected")
+
+                while True:
+                    await asyncio.sleep(settings.stats_cache_listener_ping)
+                    await asyncio.wait_for(connection.fetchval("SELECT 1"), settings.stats_cache_listener_timeout)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                print(f"Historical insert listener unavailable, retrying: {e!r}")
+            finally:
+                recovering = recovering or _listening
+                _listening = False
+                if connection is not None:
+                    connection.terminate()
+            await asyncio.sleep(settings.stats_cache_listener_retry)
+    finally:
+        flusher.cancel()
@@ -0,0 +1,40 @@
+from sqlalchemy import text, bindparam, String, Integer, Date
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+# Bars for every /stats/batch spec in one round trip. Each spec row joins on
+# idx_historical_ticker_source_timestamp with its own source and range, rows come back grouped
+# by spec (ordinality) and ordered by timestamp so they split into contiguous slices
+BatchHistoricalQuery = text("""
+    SELECT
+        s.idx,
+        CAST(extract(epoch FROM h."timestamp") * 1000 AS BIGINT),
+        coalesce(h.milliseconds, 0),
+        h.duration,
+        CAST(h."open" AS FLOAT),
+        CAST(h.low AS FLOAT),
+        CAST(h.high AS FLOAT),
+        CAST(h."close" AS FLOAT),
+        CAST(h.adj_close AS FLOAT),
+        CAST(h.volume AS FLOAT),
+        CAST(h.vwap AS FLOAT),
+        coalesce(h.transactions, 0)
+    FROM UNNEST(
+        CAST(:ids AS int[]),
+        CAST(:sources AS text[]),
+        CAST(:froms AS date[]),
+        CAST(:tos AS date[])
+    ) WITH ORDINALITY AS s(ticker_id, source, from_date, to_date, idx)
+    JOIN historical h
+    ON h.ticker_id = s.ticker_id
+    AND h.source = s.source
+    AND h."timestamp" >= s.from_date
+    AND h."timestamp" <= s.to_date
+    WHERE h.ticker_id = ANY(CAST(:ids AS int[]))
+    ORDER BY s.idx, h."timestamp"
+    """).bindparams(
+        bindparam("ids", type_=ARRAY(Integer())),
+        bindparam("sources", type_=ARRAY(String())),
+        bindparam("froms", type_=ARRAY(Date())),
+        bindparam("tos", type_=ARRAY(Date())),
+)
@@ -0,0 +1,127 @@
+import re
+import numpy as np
+from typing import Dict, Tuple
+
+Columns = Dict[str, np.ndarray]
+
+# Interval suffix -> (timespan as written in historical.duration by the ingest, milliseconds)
+INTERVAL_UNITS = {"m": ("minute", 60_000), "h": ("hour", 3_600_000), "d": ("day", 86_400_000)}
+
+
+def _splitInterval(interval: str) -> Tuple[int, str]:
+    match = re.fullmatch(r"\s*(\d+)\s*([mhd])\s*", interval.lower())
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Invalid resample interval '{interval}', use e.g. 5m, 1h or 1d")
+    return int(match.group(1)), match.group(2)
+
+
+def parseInterval(interval: str) -> int:
+    """'5m', '1h', '1d' -> milliseconds. Raises ValueError on anything else."""
+    multiplier, unit = _splitInterval(interval)
+    return multiplier * INTERVAL_UNITS[unit][1]
+
+
+def intervalDuration(interval: str) -> str:
+    """'5m' -> '5 minute', the "<multiplier> <timespan>" format stored by the ingest."""
+    multiplier, unit = _splitInterval(interval)
+    return f"{multiplier} {INTERVAL_UNITS[unit][0]}"
+
+
+def _bucketStarts(keys: np.ndarray) -> np.ndarray:
+    # Rows are ordered by timestamp, so each bucket is a contiguous run of equal keys
+    return np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+
+
+def resampleOHLCV(columns: Columns, indicators: Columns, interval: str) -> Tuple[Columns, Columns]:
+    """
+    Aggregates columnar bars into epoch-aligned (UTC) buckets: first open, max high, min low,
+    last close/adj_close, summed volume and transactions, volume-weighted vwap. Indicators
+    keep the value at each bucket's last bar.
+    """
+    size = columns["timestamp"].shape[0]
+    if size == 0:
+        return columns, indicators
+
+    width  = parseInterval(interval)
+    keys   = columns["timestamp"] // width * width
+    starts = _bucketStarts(keys)
+    ends   = np.append(starts[1:], size) - 1
+    volume = np.nan_to_num(columns["volume"])
+    traded = np.add.reduceat(volume, starts)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = np.add.reduceat(np.nan_to_num(columns["vwap"]) * volume, starts) / traded
+    vwap[traded == 0] = np.nan
+
+    out = {
+        "timestamp":    keys[starts],
+        # Each bucket keeps its first bar's epoch, in the source's own units
+        "milliseconds": columns["milliseconds"][starts],
+        "duration":     np.full(starts.shape[0], intervalDuration(interval), dtype=object),
+        "open":         columns["open"][starts],
+        "low":          np.fmin.reduceat(columns["low"], starts),
+        "high":         np.fmax.reduceat(columns["high"], starts),
+        "close":        columns["close"][ends],
+        "adj_close":    columns["adj_close"][ends],
+        "volume":       traded,
+        "vwap":         vwap,
+        "transactions": np.add.reduceat(columns["transactions"], starts),
+    }
+    return out, {name: values[ends] for name, values in indicators.items()}
+
+
+def lttbIndices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last points plus, per bucket, the point
+    forming the largest triangle with the previously kept point and the next bucket's average.
+    """
+    size = x.shape[0]
+    if max_points >= size or max_points < 3:
+        return np.arange(size)
+
+    x     = x.astype(np.float64)
+    y     = _fillGaps(y.astype(np.float64))
+    every = (size - 2) / (max_points - 2)
+    kept  = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, size - 1
+    a     = 0
+
+    for i in range(max_points - 2):
+        start    = int(i * every) + 1
+        stop     = int((i + 1) * every) + 1
+        avg_stop = min(int((i + 2) * every) + 1, size)
+        avg_x    = x[stop:avg_stop].mean() if avg_stop > stop else x[-1]
+        avg_y    = y[stop:avg_stop].mean() if avg_stop > stop else y[-1]
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a           = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def _fillGaps(values: np.ndarray) -> np.ndarray:
+    # Carries the last valid value forward (and the first one back) so NaNs don't win every bucket
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    if missing.all():
+        return np.zeros_like(values)
+    index = np.where(missing, 0, np.arange(values.shape[0]))
+    np.maximum.accumulate(index, out=index)
+    filled = values[index]
+    first  = np.flatnonzero(~missing)[0]
+    filled[:first] = values[first]
+    return filled
+
+
+def downsampleLTTB(columns: Columns, indicators: Columns, max_points: int) -> Tuple[Columns, Columns]:
+    """Keeps at most `max_points` bars chosen by LTTB on close, every column sampled at the same rows."""
+    kept = lttbIndices(columns["timestamp"], columns["close"], max_points)
+    if kept.shape[0] == columns["timestamp"].shape[0]:
+        return columns, indicators
+    return (
+        {name: values[kept] for name, values in columns.items()},
+        {name: values[kept] for name, values in indicators.items()},
+    )
@@ -1,22 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from components.responses import JSONResponse
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlalchemy import paginate
-from fastapi.encoders import jsonable_encoder
 from sqlalchemy import select, text, func, update, String
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from components.database import get_session
-from components.auth.utils import RBAChecker, ValidateJWT
-from fastapi.encoders import jsonable_encoder
+from components.database import get_session, poolStatus
+from components.services.hashing import hashing_pool
+from components.auth.utils import RBAChecker, ValidateJWT, claims_cache
+from components.permissions.utils import permission_cache
 import pandas as pd
-from .schemas import StatsParams, Github, GitLab
+from .schemas import StatsParams, BatchStatsParams, Github, GitLab
+from .queries import BatchHistoricalQuery
 from components.symbols.models import Historical
 from time import time
 import aiohttp
 from config import settings
 import re
-from components.services.indicators import Indicators
+from components.services.arrow import negotiateFormat, columnarTable, tableResponse
+from components.services.indicators import (
+    Indicators,
+    IndicatorStream,
+    computeBatchIndicators,
+    computeColumnarIndicators,
+)
+from .utils import (
+    historicalRowsStmt,
+    historicalColumnsStmt,
+    decodeHistoricalRows,
+    streamColumnarRecords,
+    streamHistoricalNdjson,
+    splitBatchRows,
+    columnarRecords,
+)
+from .resample import resampleOHLCV, downsampleLTTB
+from .cache import readCachedColumns, writeCachedColumns, cacheStats
 
 
 router = APIRouter()
@@ -28,32 +47,55 @@ router = APIRouter()
 )
 async def get_data(
     params: StatsParams,
+    request: Request,
     session: AsyncSession = Depends(get_session),
 ):
     print(params)
-    stmt = select(
-        Historical.id, 
-        Historical.custom_id, 
-        Historical.ticker_id, 
-        Historical.symbol,
-        Historical.milliseconds,
-        Historical.duration,
-        Historical.open,
-        Historical.low,
-        Historical.high,
-        Historical.close,
-        Historical.adj_close,
-        Historical.vwap,
-        Historical.timestamp,
-        Historical.transactions,
-        Historical.source,
-        Historical.market
-    ) \
-    .where(Historical.timestamp >= params.from_date) \
-    .where(Historical.timestamp <= params.to_date) \
-    .where(Historical.ticker_id == params.ticker_id) \
-    .where(Historical.source == params.source)
-    
+
+    # NDJSON through a server-side cursor, for ranges too large to hold in memory
+    if params.stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        # Bucketing and LTTB need the whole range, so they can't be applied chunk by chunk
+        if params.resample or params.max_points:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="resample and max_points are not supported with streamed responses"
+            )
+        return StreamingResponse(
+            streamHistoricalNdjson(params, IndicatorStream(params.indicators), settings.stats_stream_chunk_size),
+            media_type="application/x-ndjson"
+        )
+
+    # Arrow IPC / Parquet via the Accept header, built from the columnar arrays
+    fmt = negotiateFormat(request.headers.get("accept", ""))
+
+    # Downsampled chart data is only built on the columnar path
+    if params.columnar or fmt or params.resample or params.max_points:
+        redis       = request.app.state.redis
+        key, cached = await readCachedColumns(redis, params)
+
+        if cached is not None:
+            columns, indicators = cached
+        else:
+            results    = await session.execute(historicalColumnsStmt(params))
+            columns    = decodeHistoricalRows(results.tuples().all())
+            indicators = computeColumnarIndicators(columns, params.indicators)
+            await writeCachedColumns(redis, key, params, columns, indicators)
+
+        # Indicators above were computed on the full resolution bars
+        if params.resample:
+            columns, indicators = resampleOHLCV(columns, indicators, params.resample)
+        if params.max_points:
+            columns, indicators = downsampleLTTB(columns, indicators, params.max_points)
+
+        if fmt:
+            return tableResponse(columnarTable(columns, indicators), fmt, f"historical-{params.ticker_id}")
+
+        return StreamingResponse(
+            streamColumnarRecords(columns, indicators),
+            media_type="application/json"
+        )
+
+    stmt      = historicalRowsStmt(params)
     results   = await session.execute(stmt)
     data      = results.mappings().all()
     df        = pd.DataFrame(data)
@@ -61,12 +103,80 @@ async def get_data(
     indicator.processIndicators()
     df        = indicator.getDf()
 
-    returnObj = {
-         "data":  df.to_dict(orient="records")
-    }
-    return returnObj
+    return JSONResponse(content={"data": df.to_dict(orient="records")})
+
+
 
 
+@router.post(
+    "/batch",
+    dependencies=[
+        Depends(RBAChecker(roles=['admin', 'client'], permissions=None))]
+)
+async def get_batch_data(
+    batch: BatchStatsParams,
+    session: AsyncSession = Depends(get_session),
+):
+    specs   = batch.specs
+    results = await session.execute(BatchHistoricalQuery, {
+        "ids": [spec.ticker_id for spec in specs],
+        "sources": [spec.source for spec in specs],
+        "froms": [spec.from_date for spec in specs],
+        "tos": [spec.to_date for spec in specs],
+    })
+    segments   = splitBatchRows(results.tuples().all(), len(specs))
+    indicators = computeBatchIndicators(segments, [spec.indicators for spec in specs])
+    output     = []
+
+    for spec, columns, computed in zip(specs, segments, indicators):
+        if spec.resample:
+            columns, computed = resampleOHLCV(columns, computed, spec.resample)
+        if spec.max_points:
+            columns, computed = downsampleLTTB(columns, computed, spec.max_points)
+        output.append({
+            "ticker_id": spec.ticker_id,
+            "source": spec.source,
+            "from_date": spec.from_date,
+            "to_date": spec.to_date,
+            "data": columnarRecords(columns, computed),
+        })
+
+    return JSONResponse(content={"results": output})
+
+
+@router.get(
+    "/cache",
+    dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
+)
+async def get_cache_stats(request: Request):
+    try:
+        return await cacheStats(request.app.state.redis)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+
+@router.get(
+    "/pool",
+    dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
+)
+async def get_pool_stats():
+    return poolStatus()
+
+
+@router.get(
+    "/hashing",
+    dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
+)
+async def get_hashing_stats():
+    return hashing_pool.snapshot()
+
+
+@router.get(
+    "/auth",
+    dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
+)
+async def get_auth_cache_stats():
+    return {"claims": claims_cache.stats(), "permissions": permission_cache.stats()}
 
 
 @router.post("/gitlab/repo", description="Get Gitlab commit count", response_model=None)
@@ -1,9 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List, Any
 from datetime import date, timedelta
+from components.services.indicators import normalizeIndicators
+from config import settings
+from .resample import parseInterval
 
 
-class StatsParams(BaseModel):
+class StatsSpec(BaseModel):
     ticker_id: int
     from_date: date = date.today() - timedelta(days=100)
     to_date: date = date.today()
@@ -11,6 +14,30 @@ class StatsParams(BaseModel):
         lambda: [{"name": "MA", "period": "50"}]
     )
     source: str = "POLYGON"
+    # Chart resolution: OHLCV buckets (e.g. "5m", "1h", "1d") and/or an LTTB cap on the bar count
+    resample: Optional[str] = None
+    max_points: Optional[int] = Field(default=None, ge=3, le=settings.stats_max_points)
+
+    @field_validator("indicators")
+    def normalize_indicators(cls, v):
+        return normalizeIndicators(v)
+
+    @field_validator("resample")
+    def validate_resample(cls, v):
+        if v is not None:
+            parseInterval(v)
+        return v
+
+class StatsParams(StatsSpec):
+    columnar: bool = False
+    stream: bool = False
+
+class BatchStatsSpec(StatsSpec):
+    # Batch results are always columnar and never streamed, unknown fields are rejected with a 422
+    model_config = ConfigDict(extra="forbid")
+
+class BatchStatsParams(BaseModel):
+    specs: List[BatchStatsSpec] = Field(min_length=1, max_length=settings.stats_batch_max_specs)
 
 class GitLab(BaseModel):
 	namespace: str
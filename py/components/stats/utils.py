@@ -1,5 +1,25 @@
 import pandas as pd
 import numpy as np
+from typing import AsyncIterator, Dict, Iterator, List, Sequence
+from sqlalchemy import select, func, cast, Float, BigInteger, Select
+from components.symbols.models import Historical
+from components.database import SessionLocal
+from components.responses import dumps
+
+# Layout of the columnar fast path: (column, dtype, decimals used on output)
+COLUMNAR_LAYOUT = (
+    ("timestamp",    np.int64,   None),
+    ("milliseconds", np.int64,   None),
+    ("duration",     object,     None),
+    ("open",         np.float64, 2),
+    ("low",          np.float64, 2),
+    ("high",         np.float64, 2),
+    ("close",        np.float64, 2),
+    ("adj_close",    np.float64, 2),
+    ("volume",       np.float64, None),
+    ("vwap",         np.float64, 2),
+    ("transactions", np.int64,   None),
+)
 
 def setHistoricalDFColTypes(df: pd.DataFrame):
     if df.empty:
@@ -12,4 +32,137 @@ def setHistoricalDFColTypes(df: pd.DataFrame):
     df["low"]       = pd.to_numeric(df["low"]).round(decimals=2).replace({np.nan: None})
     df["vwap"]      = pd.to_numeric(df["vwap"]).round(decimals=2).replace({np.nan: None})
     df.columns      = [col.title() for col in df.columns]
-    return df
\ No newline at end of file
+    return df
+
+def _historicalRange(stmt: Select, params) -> Select:
+    # Matches idx_historical_ticker_source_timestamp, equality columns first then the range
+    return stmt \
+        .where(Historical.ticker_id == params.ticker_id) \
+        .where(Historical.source == params.source) \
+        .where(Historical.timestamp >= params.from_date) \
+        .where(Historical.timestamp <= params.to_date) \
+        .order_by(Historical.timestamp)
+
+def historicalRowsStmt(params) -> Select:
+    return _historicalRange(select(
+        Historical.id, 
+        Historical.custom_id, 
+        Historical.ticker_id, 
+        Historical.symbol,
+        Historical.milliseconds,
+        Historical.duration,
+        Historical.open,
+        Historical.low,
+        Historical.high,
+        Historical.close,
+        Historical.adj_close,
+        Historical.vwap,
+        Historical.timestamp,
+        Historical.transactions,
+        Historical.source,
+        Historical.market
+    ), params)
+
+def historicalColumnsStmt(params) -> Select:
+    # Numerics are cast to float8 so the driver hands back floats instead of Decimals
+    return _historicalRange(select(
+        cast(func.extract("epoch", Historical.timestamp) * 1000, BigInteger),
+        func.coalesce(Historical.milliseconds, 0),
+        Historical.duration,
+        cast(Historical.open, Float),
+        cast(Historical.low, Float),
+        cast(Historical.high, Float),
+        cast(Historical.close, Float),
+        cast(Historical.adj_close, Float),
+        cast(Historical.volume, Float),
+        cast(Historical.vwap, Float),
+        func.coalesce(Historical.transactions, 0),
+    ), params)
+
+def decodeHistoricalRows(rows: Sequence[tuple]) -> Dict[str, np.ndarray]:
+    if not rows:
+        return {name: np.empty(0, dtype=dtype) for name, dtype, _ in COLUMNAR_LAYOUT}
+
+    columns = {}
+    for (name, dtype, _), values in zip(COLUMNAR_LAYOUT, zip(*rows)):
+        columns[name] = np.array(values, dtype=dtype)
+    return columns
+
+def splitBatchRows(rows: Sequence[tuple], count: int) -> List[Dict[str, np.ndarray]]:
+    """
+    Decodes BatchHistoricalQuery rows (spec ordinality first, then COLUMNAR_LAYOUT) once and
+    returns one set of column views per spec, cut where the ordinality changes.
+    """
+    out = [None] * count
+    if rows:
+        values  = list(zip(*rows))
+        index   = np.array(values[0], dtype=np.int64)
+        columns = {name: np.array(column, dtype=dtype) for (name, dtype, _), column in zip(COLUMNAR_LAYOUT, values[1:])}
+        starts  = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1))
+        stops   = np.append(starts[1:], index.shape[0])
+        for start, stop in zip(starts, stops):
+            out[index[start] - 1] = {name: column[start:stop] for name, column in columns.items()}
+    return [columns if columns is not None else decodeHistoricalRows([]) for columns in out]
+
+def _toJsonList(values: np.ndarray, decimals: int | None = None) -> list:
+    if values.dtype.kind != "f":
+        return values.tolist()
+    if decimals is not None:
+        values = values.round(decimals)
+    mask = np.isnan(values)
+    if not mask.any():
+        return values.tolist()
+    out       = values.astype(object)
+    out[mask] = None
+    return out.tolist()
+
+def _columnarRows(
+    columns: Dict[str, np.ndarray],
+    indicators: Dict[str, np.ndarray],
+    chunk_size: int
+) -> Iterator[List[dict]]:
+    size     = len(columns["timestamp"])
+    stamps   = np.datetime_as_string(columns["timestamp"].astype("datetime64[ms]"), unit="s")
+    decimals = {name: places for name, _, places in COLUMNAR_LAYOUT}
+    fields   = [(name.title(), values, decimals.get(name)) for name, values in columns.items()]
+    fields  += [(name.title(), values, None) for name, values in indicators.items()]
+    keys     = [key for key, _, _ in fields]
+
+    for start in range(0, size, chunk_size):
+        stop   = min(start + chunk_size, size)
+        values = [
+            stamps[start:stop].tolist() if key == "Timestamp" else _toJsonList(column[start:stop], places)
+            for key, column, places in fields
+        ]
+        yield [dict(zip(keys, row)) for row in zip(*values)]
+
+def columnarRecords(columns: Dict[str, np.ndarray], indicators: Dict[str, np.ndarray]) -> List[dict]:
+    return [row for rows in _columnarRows(columns, indicators, 5000) for row in rows]
+
+def streamColumnarRecords(
+    columns: Dict[str, np.ndarray],
+    indicators: Dict[str, np.ndarray],
+    chunk_size: int = 5000
+) -> Iterator[bytes]:
+    separator = b""
+
+    yield b'{"data":['
+    for rows in _columnarRows(columns, indicators, chunk_size):
+        yield separator + dumps(rows)[1:-1]
+        separator = b","
+    yield b']}'
+
+async def streamHistoricalNdjson(params, indicator_stream, chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    One JSON record per line, read through a server-side cursor `chunk_size` rows at a time.
+    `indicator_stream` (an IndicatorStream) carries lookback windows and EMA state between
+    chunks, so memory stays flat however long the range is.
+    """
+    # The request session is closed once the route returns, the stream needs its own
+    async with SessionLocal() as session:
+        result = await session.stream(historicalColumnsStmt(params).execution_options(yield_per=chunk_size))
+        async for partition in result.partitions(chunk_size):
+            columns    = decodeHistoricalRows(partition)
+            indicators = indicator_stream.push(columns["close"], columns["high"], columns["low"])
+            for rows in _columnarRows(columns, indicators, chunk_size):
+                yield b"".join(dumps(row) + b"\n" for row in rows)
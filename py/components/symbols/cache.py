@@ -0,0 +1,130 @@
+from typing import Iterable, List, Optional, Tuple
+from pydantic import TypeAdapter
+from redis import RedisError
+from redis.asyncio import Redis
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from components.services.redis_pool import pipelined
+from .models import Tickers
+from .schemas import SymbolSchema
+
+VERSION_KEY  = "symbols:list:version"
+SNAPSHOT_KEY = "symbols:list:snapshot:{version}"
+CHANGED_KEY  = "symbols:list:changed"
+DELETED_KEY  = "symbols:list:deleted"
+
+symbol_list = TypeAdapter(List[SymbolSchema])
+
+
+class SymbolSnapshot:
+    """The latest serialized ticker list held by this worker, keyed by the shared version."""
+
+    def __init__(self):
+        self.version = None
+        self.body    = None
+
+    def get(self, version: int) -> Optional[bytes]:
+        return self.body if self.version == version else None
+
+    def set(self, version: int, body: bytes):
+        self.version = version
+        self.body    = body
+
+
+snapshot = SymbolSnapshot()
+
+
+def etagFor(version: int) -> str:
+    return f'W/"symbols-{version}"'
+
+
+async def currentVersion(redis: Redis) -> int:
+    return int(await redis.get(VERSION_KEY) or 0)
+
+
+async def _serialize(session: AsyncSession, stmt) -> bytes:
+    result = await session.execute(stmt)
+    return symbol_list.dump_json(symbol_list.validate_python(result.scalars().all(), from_attributes=True))
+
+
+async def snapshotBody(redis: Redis, session: AsyncSession, version: int) -> bytes:
+    """Full list for `version`, read from this worker, then Redis, then built from Postgres."""
+    body = snapshot.get(version)
+    if body is not None:
+        return body
+
+    key  = SNAPSHOT_KEY.format(version=version)
+    body = await redis.get(key)
+    if body is None:
+        body = await _serialize(session, select(Tickers).order_by(Tickers.name))
+        await redis.set(key, body, ex=settings.symbols_snapshot_ttl)
+
+    snapshot.set(version, body)
+    return body
+
+
+async def deltaBody(redis: Redis, session: AsyncSession, since_version: int, version: int) -> bytes:
+    """
+    Tickers added or updated after `since_version` plus the ids deleted since then.
+    Each ticker is recorded once with the version of its latest change, so the sets stay
+    as small as the tickers table.
+    """
+    changed, deleted = await pipelined(redis, [
+        ("zrangebyscore", CHANGED_KEY, f"({since_version}", "+inf"),
+        ("zrangebyscore", DELETED_KEY, f"({since_version}", "+inf"),
+    ])
+    ids     = [int(member) for member in changed]
+    # One array parameter, after a bulk import the changed set can exceed asyncpg's 32767 binds
+    query   = select(Tickers) \
+                .where(Tickers.id == any_(bindparam("ids", ids, type_=ARRAY(Integer())))) \
+                .order_by(Tickers.name)
+    tickers = await _serialize(session, query) if ids else b"[]"
+    deleted = ",".join(member.decode() for member in deleted)
+    return b'{"version":%d,"changed":%s,"deleted":[%s]}' % (version, tickers, deleted.encode())
+
+
+async def bumpSymbolsVersion(
+    redis: Redis,
+    changed: Iterable[int] = (),
+    deleted: Iterable[int] = ()
+) -> Optional[int]:
+    changed, deleted = list(changed), list(deleted)
+    try:
+        version  = await redis.incr(VERSION_KEY)
+        commands = []
+        if changed:
+            commands += [("zadd", CHANGED_KEY, {str(id): version for id in changed}),
+                         ("zrem", DELETED_KEY, *map(str, changed))]
+        if deleted:
+            commands += [("zadd", DELETED_KEY, {str(id): version for id in deleted}),
+                         ("zrem", CHANGED_KEY, *map(str, deleted))]
+        if commands:
+            await pipelined(redis, commands, transaction=True)
+        return version
+    except RedisError as e:
+        print(f"Symbol list version bump failed: {e}")
+        return None
+
+
+async def symbolListResponse(
+    redis: Redis,
+    session: AsyncSession,
+    if_none_match: Optional[str],
+    since_version: Optional[int]
+) -> Tuple[int, Optional[bytes], dict]:
+    """Returns (status code, body, headers) for /symbol/list."""
+    try:
+        version = await currentVersion(redis)
+        headers = {"ETag": etagFor(version), "X-Symbols-Version": str(version), "Cache-Control": "no-cache"}
+        if since_version is None and if_none_match == headers["ETag"]:
+            return 304, None, headers
+
+        # A client ahead of the server (e.g. after a Redis flush) gets the full list back
+        if since_version is not None and since_version <= version:
+            return 200, await deltaBody(redis, session, since_version, version), headers
+        return 200, await snapshotBody(redis, session, version), headers
+    except RedisError as e:
+        print(f"Symbol list cache unavailable: {e}")
+        return 200, await _serialize(session, select(Tickers).order_by(Tickers.name)), {}
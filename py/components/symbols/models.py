@@ -1,4 +1,4 @@
-from sqlalchemy import  String, ForeignKey, BigInteger, Numeric, DateTime, Integer, Date, Text, JSON
+from sqlalchemy import  String, ForeignKey, BigInteger, Numeric, DateTime, Integer, Date, Text, JSON, UniqueConstraint
 from datetime import datetime, date as dtDate
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from components.database import Base
@@ -13,7 +13,8 @@ class Tickers(Base):
     industry: Mapped[str]                  = mapped_column(String(length=255), nullable=True)
     market: Mapped[str]                    = mapped_column(String(length=255), nullable=False)
     market_cap: Mapped[str]                = mapped_column(String(length=255), nullable=True)
-    historical: Mapped[List["Historical"]] = relationship(back_populates="ticker", cascade="all, delete-orphan",  lazy="selectin")
+    # Never loaded implicitly, routes opt in with attachLatestBars, bars are removed by the FK cascade
+    historical: Mapped[List["Historical"]] = relationship(back_populates="ticker", cascade="all, delete-orphan",  lazy="noload", passive_deletes=True)
 
     def as_dict(self):
         return {"id": self.id, 
@@ -28,9 +29,14 @@ class Tickers(Base):
 
 
 class Historical(Base):
+    # Range partitioned by month on timestamp (migration 000018), so timestamp is part of every unique key
     __tablename__               = "historical"
+    __table_args__              = (
+        UniqueConstraint("custom_id", "timestamp"),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
     id: Mapped[int]             = mapped_column(primary_key=True, index=True)
-    custom_id: Mapped[str]      = mapped_column(String(length=255), unique=True, index=True)
+    custom_id: Mapped[str]      = mapped_column(String(length=255), index=True)
     ticker_id: Mapped[int]      = mapped_column(ForeignKey("tickers.id", ondelete="CASCADE"), nullable=False)
     symbol: Mapped[str]         = mapped_column(String(length=255), nullable=False)
     milliseconds: Mapped[int]   = mapped_column(BigInteger, nullable=True, default=0)
@@ -42,11 +48,11 @@ class Historical(Base):
     adj_close: Mapped[float]    = mapped_column(Numeric(precision=30, scale=15), nullable=True)
     volume: Mapped[float]       = mapped_column(Numeric(precision=20, scale=2), default=0)
     vwap: Mapped[float]         = mapped_column(Numeric(precision=30, scale=15), default=0)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, index=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, index=True)
     transactions: Mapped[int]   = mapped_column(Integer,default=0)
     source: Mapped[str]         = mapped_column(String(length=30), nullable=False)
     market: Mapped[str]         = mapped_column(String(length=30), nullable=False)
-    ticker: Mapped["Tickers"]   = relationship("Tickers", back_populates="historical", lazy="selectin")
+    ticker: Mapped["Tickers"]   = relationship("Tickers", back_populates="historical", lazy="raise")
 
     def __repr__(self):
         return f"{self.symbol} | {self.timestamp} | {self.duration}"
@@ -0,0 +1,37 @@
+from sqlalchemy import text, bindparam, String, Integer
+
+
+# Exact symbol, then symbol/name prefixes, then trigram similarity; every predicate can use
+# the pg_trgm GIN indexes from migration 000019
+SearchTickersQuery = text("""
+    SELECT
+        id,
+        symbol,
+        name,
+        market,
+        industry,
+        CASE
+            WHEN upper(symbol) = upper(:q) THEN 3.0
+            WHEN symbol ILIKE :prefix THEN 2.0
+            WHEN name ILIKE :prefix THEN 1.5
+            ELSE 0.0
+        END
+        + GREATEST(
+            similarity(symbol, :q),
+            word_similarity(:q, name),
+            word_similarity(:q, alt_names::text) * 0.5
+        ) AS rank
+    FROM tickers
+    WHERE symbol ILIKE :prefix
+        OR name ILIKE :contains
+        OR alt_names::text ILIKE :contains
+        OR symbol % :q
+        OR :q <% name
+    ORDER BY rank DESC, length(symbol), symbol
+    LIMIT :limit
+    """).bindparams(
+        bindparam("q", type_=String()),
+        bindparam("prefix", type_=String()),
+        bindparam("contains", type_=String()),
+        bindparam("limit", type_=Integer()),
+)
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Body, Query
+from fastapi.responses import Response
+from components.responses import JSONResponse
+from fastapi_pagination import Page, pagination_ctx
 from fastapi_pagination.ext.sqlalchemy import paginate
-from sqlalchemy import select, func, String, Select, update
+from sqlalchemy import select, Select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from components.database import get_session
 from components.auth.utils import RBAChecker, ValidateJWT
-from .schemas import SymbolSchema, UpdateSymbolBody, AddSymbolBody, DeleteSymbolBody
-from .models import Tickers
-from typing import Union, List
+from .schemas import SymbolSchema, SymbolListDeltaSchema, UpdateSymbolBody, AddSymbolBody, DeleteSymbolBody
+from .models import Tickers, Historical
+from .utils import attachLatestBars, TickerImport, parseTickerRows
+from .cache import symbolListResponse, bumpSymbolsVersion
+from .search import symbol_search
+from components.pagination import CursorParams, CursorPage, cursorPaginate
+from typing import Union, List, Optional, Literal
+from functools import partial
+from config import settings
 
 
 router = APIRouter()
@@ -19,51 +26,29 @@ router = APIRouter()
     dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
 )
 async def add_ticker(
+    request: Request,
     data: Union[AddSymbolBody, List[AddSymbolBody]] = Body(...),
     session: AsyncSession = Depends(get_session),
     user: dict = Depends(ValidateJWT)
 ):
-    tickers = data if isinstance(data, list) else [data]
-
-    successes = []
-    failures = []
+    tickers  = data if isinstance(data, list) else [data]
+    importer = TickerImport(session, settings.symbols_bulk_chunk_size)
 
     try:
-        for entry in tickers:
-            stmt = select(Tickers).where(
-                Tickers.symbol == entry.symbol,
-                Tickers.market == entry.market
-            )
-            result = await session.execute(stmt)
-            exists = result.scalar_one_or_none()
-
-            if exists:
-                failures.append({
-                    "symbol": entry.symbol,
-                    "market": entry.market,
-                    "reason": "Already exists"
-                })
-                continue
-
-            new_ticker = Tickers(
-                symbol=entry.symbol,
-                name=entry.name,
-                alt_names=entry.alt_names,
-                industry=entry.industry,
-                market=entry.market,
-                market_cap=entry.market_cap,
-            )
-            session.add(new_ticker)
-            successes.append(entry.symbol)
-
-        await session.commit()
+        for row, entry in enumerate(tickers, start=1):
+            await importer.add(row, entry)
+        await importer.flush()
 
+        reasons = {"exists": "Already exists", "duplicate": "Duplicate in request"}
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "success": True,
-                "added": successes,
-                "skipped": failures,
+                "added": [result["symbol"] for result in importer.report() if result["status"] == "added"],
+                "skipped": [
+                    {"symbol": result["symbol"], "market": result["market"], "reason": reasons[result["status"]]}
+                    for result in importer.report() if result["status"] in reasons
+                ],
             },
         )
 
@@ -74,6 +59,55 @@ async def add_ticker(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not process, please try again"
         )
+    finally:
+        # Chunks committed before a failure are already visible
+        if importer.added_ids:
+            await bumpSymbolsVersion(request.app.state.redis, changed=importer.added_ids)
+
+
+@router.post(
+    "/add/bulk",
+    dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))],
+    description="Stream tickers as NDJSON (application/x-ndjson) or CSV (text/csv) with a header row"
+)
+async def add_tickers_bulk(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    formats      = {"application/x-ndjson": "ndjson", "application/jsonl": "ndjson", "text/csv": "csv"}
+
+    if content_type not in formats:
+        return JSONResponse(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            content={"success": False, "error": "Send application/x-ndjson or text/csv"}
+        )
+
+    importer = TickerImport(session, settings.symbols_bulk_chunk_size)
+    try:
+        async for row, entry in parseTickerRows(request.stream(), formats[content_type]):
+            if isinstance(entry, str):
+                importer.invalid(row, entry)
+            else:
+                await importer.add(row, entry)
+        await importer.flush()
+
+    except Exception as e:
+        await session.rollback()
+        print(f"Error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not process, please try again"
+        )
+    finally:
+        # Chunks committed before a failure are already visible
+        if importer.added_ids:
+            await bumpSymbolsVersion(request.app.state.redis, changed=importer.added_ids)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"success": True, "summary": importer.summary(), "results": importer.report()},
+    )
 
 
 @router.post(
@@ -81,6 +115,7 @@ async def add_ticker(
     dependencies=[Depends(RBAChecker(roles=['admin'], permissions=None))]
 )
 async def update_ticker(
+    request: Request,
     data: UpdateSymbolBody,
     session: AsyncSession = Depends(get_session),
 ):
@@ -110,6 +145,7 @@ async def update_ticker(
         )
         await session.execute(stmt)
         await session.commit()
+        await bumpSymbolsVersion(request.app.state.redis, changed=[data.id])
 
         # === Step 4: Fetch and return updated Ticker ===
         await session.refresh(ticker)
@@ -133,37 +169,79 @@ async def update_ticker(
 
 @router.get(
     "/all",
-    response_model=Page[SymbolSchema],
+    response_model=Union[Page[SymbolSchema], CursorPage[SymbolSchema]],
     dependencies=[
-        Depends(RBAChecker(roles=['admin', 'client', 'demo'], permissions=None))]
+        Depends(RBAChecker(roles=['admin', 'client', 'demo'], permissions=None)),
+        Depends(pagination_ctx(Page[SymbolSchema]))],
+    description="Send ?cursor= (empty for the first page) for keyset pages with opaque cursors"
 )
 async def get_tickers(
     request: Request,
     session: AsyncSession = Depends(get_session),
+    include: Optional[Literal["latest_bar"]] = None,
+    bars: int = Query(default=1, ge=1, le=settings.watchlist_max_bars),
+    cursor: CursorParams = Depends()
 ):
     queryParams = dict(request.query_params)
     query       = select(Tickers) \
                     .order_by(Tickers.name)
 
     if "name" in queryParams:
-        query = query.filter(func.cast(Tickers.name, String).ilike(
-            f"%{queryParams['name']}%"))
+        # Plain ILIKE on the column so the pg_trgm GIN index can be used
+        query = query.filter(Tickers.name.ilike(f"%{queryParams['name']}%"))
 
-    return await paginate(session, query=query)
+    transformer = partial(attachLatestBars, session, bars=bars) if include == "latest_bar" else None
+    if cursor.enabled:
+        return await cursorPaginate(
+            session, query, [Tickers.name, Tickers.id], SymbolSchema, cursor, request.app.state.redis, transformer
+        )
+    return await paginate(session, query=query, transformer=transformer)
+
+@router.get(
+    "/search",
+    dependencies=[
+        Depends(RBAChecker(roles=['admin', 'client', 'demo'], permissions=None))],
+    description="Ranked prefix and fuzzy ticker search for autocomplete"
+)
+async def search_tickers(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=settings.symbol_search_max_limit),
+    session: AsyncSession = Depends(get_session),
+):
+    result = await symbol_search.search(request.app.state.redis, session, q, limit)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"success": True, **result},
+    )
 
 @router.get(
     "/list",
-    response_model=List[SymbolSchema],
+    response_model=Union[List[SymbolSchema], SymbolListDeltaSchema],
     dependencies=[
         Depends(RBAChecker(roles=['admin', 'client', 'demo'], permissions=None))]
 )
 async def get_list_of_tickers(
     request: Request,
     session: AsyncSession = Depends(get_session),
+    include: Optional[Literal["latest_bar"]] = None,
+    bars: int = Query(default=1, ge=1, le=settings.watchlist_max_bars),
+    since_version: Optional[int] = Query(default=None, ge=0)
 ):
-    result  = await session.execute(select(Tickers).order_by(Tickers.name))
-    tickers = result.scalars().all()
-    return tickers
+    if include == "latest_bar":
+        result  = await session.execute(select(Tickers).order_by(Tickers.name))
+        tickers = result.scalars().all()
+        await attachLatestBars(session, tickers, bars)
+        return tickers
+
+    # Versioned snapshot: 304 on a matching ETag, only changed tickers with ?since_version=
+    status_code, body, headers = await symbolListResponse(
+        request.app.state.redis,
+        session,
+        request.headers.get("if-none-match"),
+        since_version
+    )
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
 
 @router.delete(
     "/delete",
@@ -171,6 +249,7 @@ async def get_list_of_tickers(
         Depends(RBAChecker(roles=['admin'], permissions=None))]
 )
 async def delete_ticker(
+    request: Request,
     data: DeleteSymbolBody,
     session: AsyncSession = Depends(get_session),
 ):
@@ -181,8 +260,10 @@ async def delete_ticker(
     if not ticker:
         raise HTTPException(status_code=404, detail="Ticker not found")
 
-    # Delete and commit
+    # Bars go in one statement instead of being loaded and deleted one by one
+    await session.execute(delete(Historical).where(Historical.ticker_id == ticker.id))
     await session.delete(ticker)
     await session.commit()
+    await bumpSymbolsVersion(request.app.state.redis, deleted=[data.id])
 
     return {"message": f"Ticker deleted successfully"}
\ No newline at end of file
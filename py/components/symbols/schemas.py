@@ -78,6 +78,12 @@ class SymbolSchema(BaseModel):
     market_cap: Optional[str] = Field(None, max_length=255)
     historical: Optional[List[HistoricalSchema]] = None
 
+class SymbolListDeltaSchema(BaseModel):
+    # /symbol/list?since_version= body: tickers changed and ids deleted after that version
+    version: int
+    changed: List[SymbolSchema]
+    deleted: List[int]
+
 class SymbolDataSchema(BaseModel):
     min_close: Optional[float] = None
     max_close: Optional[float] = None
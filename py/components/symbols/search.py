@@ -0,0 +1,129 @@
+from time import perf_counter
+from typing import List, Optional, Tuple
+from redis import RedisError
+from redis.asyncio import Redis
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from .models import Tickers
+from .queries import SearchTickersQuery
+from .cache import currentVersion
+
+Match = Tuple[int, str, str, str, Optional[str]]
+
+
+class SymbolTrie:
+    """
+    Prefix trie over lower-cased symbols and names, only `depth` characters deep. Each node keeps
+    the first `width` tickers reaching it (symbol matches first, shorter symbols first), which is
+    all autocomplete needs for the short prefixes trigram indexes can't serve well.
+    """
+
+    def __init__(self, tickers: List[Match], depth: int, width: int):
+        self.depth    = depth
+        self.width    = width
+        self.tickers  = tickers
+        self.root     = {}
+        self.nodes    = 0
+
+        ordered = sorted(range(len(tickers)), key=lambda i: (len(tickers[i][1]), tickers[i][1]))
+        for field in (1, 2):
+            for index in ordered:
+                self._insert((tickers[index][field] or "").lower(), index)
+
+    def _insert(self, key: str, index: int):
+        node = self.root
+        for char in key[:self.depth]:
+            if char not in node:
+                node[char] = {"": []}
+                self.nodes += 1
+            node  = node[char]
+            found = node[""]
+            if len(found) < self.width and index not in found:
+                found.append(index)
+
+    def search(self, prefix: str, limit: int) -> List[dict]:
+        node = self.root
+        for char in prefix.lower()[:self.depth]:
+            node = node.get(char)
+            if node is None:
+                return []
+
+        matches = [self.tickers[index] for index in node.get("", [])]
+        if len(prefix) > self.depth:
+            needle  = prefix.lower()
+            matches = [t for t in matches if t[1].lower().startswith(needle) or (t[2] or "").lower().startswith(needle)]
+        return [_asDict(match) for match in matches[:limit]]
+
+
+def _asDict(match: Match, rank: float = None) -> dict:
+    out = {"id": match[0], "symbol": match[1], "name": match[2], "market": match[3], "industry": match[4]}
+    if rank is not None:
+        out["rank"] = round(float(rank), 4)
+    return out
+
+
+def _escapeLike(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SymbolSearch:
+    """Holds the trie for the current /symbol/list version and rebuilds it when tickers change."""
+
+    def __init__(self):
+        self.version = None
+        self.trie    = None
+
+    async def getTrie(self, redis: Redis, session: AsyncSession) -> SymbolTrie:
+        try:
+            version = await currentVersion(redis)
+        except RedisError as e:
+            print(f"Symbol version unavailable: {e}")
+            version = self.version
+
+        if self.trie is None or version != self.version:
+            result       = await session.execute(
+                select(Tickers.id, Tickers.symbol, Tickers.name, Tickers.market, Tickers.industry)
+            )
+            self.trie    = SymbolTrie(result.tuples().all(), settings.symbol_trie_depth, settings.symbol_trie_width)
+            self.version = version
+        return self.trie
+
+    async def search(self, redis: Redis, session: AsyncSession, q: str, limit: int) -> dict:
+        start = perf_counter()
+        trie  = await self.getTrie(redis, session)
+        term  = q.strip()
+
+        # Short prefixes are answered in-process, trigram indexes need at least three characters
+        if len(term) <= trie.depth:
+            return _response(trie.search(term, limit), "trie", start)
+
+        try:
+            # Latency budget: Postgres cancels the search instead of letting a keystroke queue up
+            await session.execute(text(f"SET LOCAL statement_timeout = {int(settings.symbol_search_budget_ms)}"))
+            result = await session.execute(SearchTickersQuery, {
+                "q": term,
+                "prefix": f"{_escapeLike(term)}%",
+                "contains": f"%{_escapeLike(term)}%",
+                "limit": limit,
+            })
+            rows = [_asDict(row[:5], row[5]) for row in result.tuples()]
+            await session.commit()
+            return _response(rows, "db", start)
+        except DBAPIError as e:
+            await session.rollback()
+            print(f"Symbol search over budget or failed: {e}")
+            return _response(trie.search(term, limit), "trie", start, partial=True)
+
+
+def _response(results: List[dict], source: str, start: float, partial: bool = False) -> dict:
+    return {
+        "results": results,
+        "source": source,
+        "partial": partial,
+        "elapsed_ms": round((perf_counter() - start) * 1000, 2),
+    }
+
+
+symbol_search = SymbolSearch()
@@ -1,4 +1,177 @@
+import asyncio
+import csv
+import json
+from collections import defaultdict, Counter
+from datetime import date
+from typing import AsyncIterator, Dict, Sequence, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import Integer, any_, bindparam, select, text, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from components.database import engine
+from config import settings
+from .models import Tickers, Historical
+from .schemas import AddSymbolBody
 
+# Both functions are created by migration 000018_partition_historical_by_month
+CreatePartitionsQuery = text("SELECT create_historical_partitions(CAST(:start AS date), :months)")
+DrainDefaultQuery     = text("SELECT drain_historical_default()")
 
-        
-    
+
+async def ensureHistoricalPartitions(months_ahead: int | None = None) -> int:
+    """
+    Creates the current month's partition plus `months_ahead` future ones, then gives every
+    month parked in historical_default its own partition. Returns the number created.
+    """
+    months_ahead = settings.historical_partition_months_ahead if months_ahead is None else months_ahead
+    async with engine.begin() as connection:
+        created  = (await connection.execute(CreatePartitionsQuery, {
+            "start": date.today().replace(day=1),
+            "months": months_ahead + 1,
+        })).scalar()
+        created += (await connection.execute(DrainDefaultQuery)).scalar()
+    return created
+
+
+async def maintainHistoricalPartitions():
+    # Runs for the lifetime of the app so ingest never has to fall back to the default partition
+    while True:
+        try:
+            created = await ensureHistoricalPartitions()
+            if created:
+                print(f"Created {created} historical partitions")
+        except (DBAPIError, OSError) as e:
+            print(f"Historical partition maintenance failed: {e}")
+        await asyncio.sleep(settings.historical_partition_interval)
+
+
+async def attachLatestBars(session: AsyncSession, tickers: Sequence[Tickers], bars: int = 1) -> Sequence[Tickers]:
+    """
+    Loads the newest `bars` rows of every ticker with a single LATERAL query and sets them as
+    each ticker's loaded `historical` collection, without marking the tickers dirty.
+    """
+    if not tickers:
+        return tickers
+
+    # One array parameter, an IN list would need a bind parameter per ticker (asyncpg allows 32767)
+    ids    = bindparam("ids", [ticker.id for ticker in tickers], type_=ARRAY(Integer()))
+    driver = select(Tickers.id).where(Tickers.id == any_(ids)).subquery()
+    latest = select(Historical) \
+                .where(Historical.ticker_id == driver.c.id) \
+                .order_by(Historical.timestamp.desc()) \
+                .limit(bars) \
+                .lateral()
+    result = await session.execute(select(aliased(Historical, latest)).select_from(driver).join(latest, true()))
+    grouped = defaultdict(list)
+
+    for bar in result.scalars():
+        grouped[bar.ticker_id].append(bar)
+    for ticker in tickers:
+        set_committed_value(ticker, "historical", grouped.get(ticker.id, []))
+    return tickers
+
+
+async def insertTickers(session: AsyncSession, entries: Sequence[AddSymbolBody]) -> Dict[str, int]:
+    """One INSERT ... ON CONFLICT (symbol) DO NOTHING for the chunk, returns symbol -> id of new rows."""
+    stmt   = insert(Tickers) \
+                .values([entry.model_dump() for entry in entries]) \
+                .on_conflict_do_nothing(index_elements=[Tickers.symbol]) \
+                .returning(Tickers.id, Tickers.symbol)
+    result = await session.execute(stmt)
+    return {symbol: id for id, symbol in result.tuples()}
+
+
+class TickerImport:
+    """
+    Buffers validated rows and upserts them `chunk_size` at a time, committing each chunk so
+    a large import never holds one long transaction. Keeps a per-row result report.
+    """
+
+    def __init__(self, session: AsyncSession, chunk_size: int = 1000):
+        self.session    = session
+        self.chunk_size = chunk_size
+        self.pending    = []
+        self.seen       = set()
+        self.results    = []
+        self.added_ids  = []
+
+    async def add(self, row: int, entry: AddSymbolBody):
+        if entry.symbol in self.seen:
+            self.results.append({"row": row, "symbol": entry.symbol, "market": entry.market, "status": "duplicate"})
+            return
+
+        self.seen.add(entry.symbol)
+        self.pending.append((row, entry))
+        if len(self.pending) >= self.chunk_size:
+            await self.flush()
+
+    def invalid(self, row: int, error: str):
+        self.results.append({"row": row, "status": "invalid", "error": error})
+
+    async def flush(self):
+        if not self.pending:
+            return
+
+        inserted = await insertTickers(self.session, [entry for _, entry in self.pending])
+        await self.session.commit()
+
+        for row, entry in self.pending:
+            result = {"row": row, "symbol": entry.symbol, "market": entry.market, "status": "exists"}
+            if entry.symbol in inserted:
+                result.update(status="added", id=inserted[entry.symbol])
+            self.results.append(result)
+        self.added_ids += inserted.values()
+        self.pending    = []
+
+    def report(self) -> list:
+        return sorted(self.results, key=lambda result: result["row"])
+
+    def summary(self) -> dict:
+        return dict(Counter(result["status"] for result in self.results))
+
+
+async def _lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def parseTickerRows(
+    stream: AsyncIterator[bytes],
+    format: str
+) -> AsyncIterator[Tuple[int, Union[AddSymbolBody, str]]]:
+    """
+    Yields (row number, AddSymbolBody or error message) from an NDJSON or CSV body as it arrives.
+    CSV needs a header row and one record per line, empty cells become nulls.
+    """
+    header = None
+    row    = 0
+
+    async for line in _lines(stream):
+        if not line.strip():
+            continue
+        if format == "csv" and header is None:
+            header = [name.strip() for name in next(csv.reader([line]))]
+            continue
+
+        row += 1
+        try:
+            if format == "csv":
+                values = next(csv.reader([line]))
+                record = {name: value or None for name, value in zip(header, values)}
+            else:
+                record = json.loads(line)
+            yield row, AddSymbolBody.model_validate(record)
+        except ValidationError as e:
+            yield row, "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+        except ValueError as e:
+            yield row, str(e)
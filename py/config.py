@@ -1,3 +1,4 @@
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,12 +11,80 @@ class Settings(BaseSettings):
     db_password: str | None = None
     db_host: str | None = None
     db_port: int | None = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
 
     # Redis
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db: int = 0
     redis_password: str | None = None
+    redis_max_connections: int = 50
+    redis_health_check_interval: int = 30
+    redis_socket_timeout: float = 5.0
+
+    # Verified JWT claims, entries expire with the token or after the ttl when it has no exp
+    jwt_claims_cache_size: int = 8192
+    jwt_claims_cache_ttl: int = 300
+
+    # Permission cache (in-process entries are not invalidated across workers, keep ttl short)
+    permission_cache_size: int = 4096
+    permission_cache_ttl: int = 30
+    permission_cache_redis_ttl: int = 900
+
+    # bcrypt worker pool, callers past workers + max_pending wait hash_wait_timeout then get a 503
+    hash_workers: int = 4
+    hash_max_pending: int = 64
+    hash_wait_timeout: float = 2.0
+
+    # Watchlist bars returned per symbol (default and upper bound for ?bars=)
+    watchlist_bars: int = 100
+    watchlist_max_bars: int = 500
+
+    # Historical monthly partitions kept ahead of time, checked every interval seconds
+    historical_partition_months_ahead: int = 3
+    historical_partition_interval: int = 21600
+
+    # Symbol list snapshots in Redis, one per version
+    symbols_snapshot_ttl: int = 86400
+
+    # Rows per INSERT ... ON CONFLICT statement (and transaction) for symbol imports, each row binds
+    # 6 parameters and asyncpg allows at most 32767 per statement
+    symbols_bulk_chunk_size: int = Field(default=1000, ge=1, le=32767 // 6)
+
+    # Symbol search: prefixes up to trie depth are served in-process (width tickers per node),
+    # longer queries get a trigram search cancelled after the budget
+    symbol_trie_depth: int = 3
+    symbol_trie_width: int = 20
+    symbol_search_budget_ms: int = 150
+    symbol_search_max_limit: int = 50
+
+    # Keyset pagination: seconds a list endpoint's total (?include_total=true) is reused
+    pagination_count_ttl: int = 60
+
+    # Rows fetched per server-side cursor round trip for streamed /stats/data responses
+    stats_stream_chunk_size: int = 5000
+
+    # Upper bound for the LTTB max_points of a /stats/data request
+    stats_max_points: int = 20000
+
+    # Specs accepted by one /stats/batch request
+    stats_batch_max_specs: int = 50
+
+    # Stats cache
+    stats_cache_enabled: bool = True
+    stats_cache_min_ttl: int = 60
+    stats_cache_max_ttl: int = 86400
+    # Historical insert notifications are coalesced per ticker for this long before invalidating
+    stats_cache_invalidate_delay_ms: int = 500
+    # Seconds between listener health checks, the timeout of each, and the reconnect delay
+    stats_cache_listener_ping: int = 30
+    stats_cache_listener_timeout: int = 10
+    stats_cache_listener_retry: int = 5
 
     # Secrets
     jwt_secret: str | None = ""
@@ -0,0 +1,123 @@
+"""
+Copy historical_legacy (the heap table renamed by migration 000018) into the monthly
+partitioned historical table. Run it right after migrating, history older than the migration
+is missing from reads until its month has been copied.
+
+    python scripts/backfill_historical_partitions.py --batch 20000
+    python scripts/backfill_historical_partitions.py --drop-legacy
+
+Months are copied newest first so recent charts and watchlists fill in before older history.
+Each batch commits on its own and conflicts on (custom_id, timestamp) are skipped, so the
+script can be stopped and rerun at any time. --drop-legacy drops historical_legacy once every
+legacy row is present in the partitioned table, after which the migration can't be rolled back.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from components.database import engine
+from components.symbols.utils import CreatePartitionsQuery
+
+COLUMNS = "id, custom_id, symbol, milliseconds, duration, open, low, high, close, adj_close, " \
+          "volume, vwap, \"timestamp\", transactions, source, market, ticker_id"
+
+LegacyRangeQuery = text("""
+    SELECT date_trunc('month', min("timestamp"))::date, date_trunc('month', max("timestamp"))::date
+    FROM historical_legacy
+""")
+
+CopyBatchQuery = text(f"""
+    WITH batch AS (
+        SELECT {COLUMNS}
+        FROM historical_legacy
+        WHERE "timestamp" >= :start AND "timestamp" < :end AND id > :after
+        ORDER BY id
+        LIMIT :batch
+    ), inserted AS (
+        INSERT INTO historical ({COLUMNS})
+        SELECT {COLUMNS} FROM batch
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT max(id) FROM batch), (SELECT count(*) FROM batch), (SELECT count(*) FROM inserted)
+""")
+
+MissingRowsQuery = text("""
+    SELECT count(*)
+    FROM historical_legacy l
+    WHERE NOT EXISTS (
+        SELECT 1 FROM historical h WHERE h.custom_id = l.custom_id AND h."timestamp" = l."timestamp"
+    )
+""")
+
+
+def _months(first: date, last: date):
+    month = last
+    while month >= first:
+        yield month
+        month = date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+
+
+def _next(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+async def copyMonth(month: date, batch: int) -> tuple:
+    after, scanned, copied = 0, 0, 0
+    async with engine.begin() as connection:
+        await connection.execute(CreatePartitionsQuery, {"start": month, "months": 1})
+
+    while True:
+        async with engine.begin() as connection:
+            last, rows, inserted = (await connection.execute(CopyBatchQuery, {
+                "start": month, "end": _next(month), "after": after, "batch": batch,
+            })).one()
+        if not rows:
+            return scanned, copied
+        after    = last
+        scanned += rows
+        copied  += inserted
+
+
+async def run(args):
+    async with engine.connect() as connection:
+        if (await connection.execute(text("SELECT to_regclass('historical_legacy')"))).scalar() is None:
+            print("historical_legacy does not exist, nothing to backfill")
+            return
+        first, last = (await connection.execute(LegacyRangeQuery)).one()
+
+    if first is not None:
+        for month in _months(first, last):
+            start           = time.perf_counter()
+            scanned, copied = await copyMonth(month, args.batch)
+            print(f"{month:%Y-%m}  scanned {scanned:>10}  copied {copied:>10}  {time.perf_counter() - start:.1f}s")
+
+    async with engine.begin() as connection:
+        await connection.execute(text("ANALYZE historical"))
+
+    if args.drop_legacy:
+        async with engine.begin() as connection:
+            missing = (await connection.execute(MissingRowsQuery)).scalar()
+            if missing:
+                print(f"Keeping historical_legacy, {missing} rows are not in historical yet")
+            else:
+                await connection.execute(text("DROP TABLE historical_legacy"))
+                print("Dropped historical_legacy")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=20_000)
+    parser.add_argument("--drop-legacy", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()